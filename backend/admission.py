@@ -0,0 +1,179 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from config import Config
+import metrics
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request is turned away instead of waiting for a slot
+
+    Attributes:
+        reason: 'queue_full', 'client_limit' or 'timeout'
+        status: HTTP status to answer with (429 for a client over its share, 503 otherwise)
+        retry_after: Seconds after which a retry is likely to be admitted
+        client: The client that was turned away
+    """
+
+    def __init__(self, reason: str, status: int, retry_after: int, message: str, client: str):
+        super().__init__(message)
+        self.reason = reason
+        self.client = client
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ('client', 'event', 'granted', 'since')
+
+    def __init__(self, client: str):
+        self.client = client
+        self.event = threading.Event()
+        self.granted = False
+        self.since = time.monotonic()
+
+
+class AdmissionController:
+    """
+    Caps how many expensive requests run at once, with a bounded, fair wait queue
+
+    A request that finds every slot taken waits in a queue; a request that finds
+    the queue full, or whose client already holds its share of slots and queue
+    places, is rejected at once. Freed slots are handed to the waiting client
+    with the fewest running requests, and among those to the one served least
+    recently, so clients take turns and one caller can't monopolize the slots
+    by sending many requests.
+
+    Args:
+        max_concurrent: Requests allowed to run at once
+        max_queue: Requests allowed to wait for a slot
+        max_wait: Seconds a request waits before it is rejected
+        max_per_client: Running plus waiting requests allowed per client
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, max_wait: float, max_per_client: int):
+        self.max_concurrent = max(max_concurrent, 1)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.max_per_client = max_per_client
+        self._lock = threading.Lock()
+        self._running: Dict[str, int] = {}
+        self._waiting: 'OrderedDict[str, deque]' = OrderedDict()
+        # When each client with running or waiting requests was last granted a slot
+        self._last_grant: Dict[str, float] = {}
+        self._active = 0
+        self._queued = 0
+        # Moving average of how long a slot is held, for Retry-After
+        self._hold_seconds = None
+
+    def _retry_after(self) -> int:
+        hold = self._hold_seconds if self._hold_seconds is not None else self.max_wait
+        return max(1, math.ceil(hold * (self._queued + 1) / self.max_concurrent))
+
+    def _reject(self, client: str, reason: str, status: int, message: str):
+        metrics.admission_requests.inc(outcome=reason)
+        raise AdmissionRejected(reason, status, self._retry_after(), message, client)
+
+    @contextmanager
+    def admit(self, client: str) -> Iterator[None]:
+        """
+        Hold a slot for the duration of the block, waiting for one if needed
+
+        Args:
+            client: Identifies the caller for fairness, e.g. its address
+
+        Raises:
+            AdmissionRejected: If the request can't be admitted
+        """
+        start = time.monotonic()
+        with self._lock:
+            if self._running.get(client, 0) + len(self._waiting.get(client, ())) >= self.max_per_client:
+                self._reject(client, 'client_limit', 429, "Too many plan requests from this client")
+            if self._active < self.max_concurrent and not self._queued:
+                self._grant(client)
+                waiter = None
+            elif self._queued >= self.max_queue:
+                self._reject(client, 'queue_full', 503, "Server is busy, too many plan requests queued")
+            else:
+                waiter = _Waiter(client)
+                self._waiting.setdefault(client, deque()).append(waiter)
+                self._queued += 1
+
+        if waiter is not None and not waiter.event.wait(self.max_wait):
+            with self._lock:
+                # The slot may have been handed over just as the wait timed out
+                if not waiter.granted:
+                    self._remove(waiter)
+                    self._reject(client, 'timeout', 503, "Timed out waiting for a free plan slot")
+
+        waited = time.monotonic() - start
+        metrics.admission_requests.inc(outcome='admitted')
+        metrics.admission_wait.observe(waited)
+        try:
+            yield
+        finally:
+            with self._lock:
+                held = time.monotonic() - start - waited
+                self._hold_seconds = held if self._hold_seconds is None else 0.8 * self._hold_seconds + 0.2 * held
+                self._release(client)
+
+    def _grant(self, client: str):
+        self._active += 1
+        self._running[client] = self._running.get(client, 0) + 1
+        self._last_grant[client] = time.monotonic()
+
+    def _remove(self, waiter: _Waiter):
+        queue = self._waiting[waiter.client]
+        queue.remove(waiter)
+        if not queue:
+            del self._waiting[waiter.client]
+            if waiter.client not in self._running:
+                self._last_grant.pop(waiter.client, None)
+        self._queued -= 1
+
+    def _release(self, client: str):
+        self._active -= 1
+        self._running[client] -= 1
+        if not self._running[client]:
+            del self._running[client]
+            if client not in self._waiting:
+                del self._last_grant[client]
+        if not self._waiting:
+            return
+        # Fewest running requests first, then whoever was served least recently
+        next_client = min(
+            self._waiting,
+            key=lambda c: (self._running.get(c, 0), self._last_grant.get(c, 0.0), self._waiting[c][0].since)
+        )
+        waiter = self._waiting[next_client][0]
+        self._remove(waiter)
+        self._grant(next_client)
+        waiter.granted = True
+        waiter.event.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'running': self._active,
+                'waiting': self._queued,
+                'clients': len(set(self._running) | set(self._waiting))
+            }
+
+
+admission = AdmissionController(
+    max_concurrent=Config.ADMISSION_MAX_CONCURRENT,
+    max_queue=Config.ADMISSION_MAX_QUEUE,
+    max_wait=Config.ADMISSION_MAX_WAIT,
+    max_per_client=Config.ADMISSION_MAX_PER_CLIENT
+)
+
+metrics.registry.register(metrics.Gauge(
+    'admission_slots', 'Plan generations running and waiting for a slot',
+    lambda: {(state,): admission.stats()[state] for state in ('running', 'waiting')},
+    ['state']
+))
@@ -1,21 +1,38 @@
+import functools
+import inspect
 import json
-import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dotenv import load_dotenv
 import os
-from typing import Dict, List, Any, Optional
-from llama_index.core.agent import ReActAgent
-from llama_index.core.tools import FunctionTool
-from llama_index.llms.gemini import Gemini
+from typing import TYPE_CHECKING, Callable, Dict, List, Any, Optional
 
 # Import our tools
 from tools import (
     search_wikipedia, 
+    search_wikipedia_async,
     search_web, 
+    search_web_async,
     search_youtube, 
+    search_youtube_async,
     generate_timeline,
-    format_learning_plan
+    generate_timeline_async,
+    format_learning_plan,
+    format_learning_plan_async
 )
 from config import Config
+from event_loop import run_sync
+from models import LearningPlan, Step
+from plan_parser import extract_plan, extract_plan_from_tools, outline_lines
+from research import research_steps_async
+import metrics
+
+if TYPE_CHECKING:
+    from llama_index.core.agent import ReActAgent
+    from llama_index.core.tools import FunctionTool
+    from llama_index.llms.gemini import Gemini
 
 # Load environment variables
 load_dotenv()
@@ -23,61 +40,368 @@ load_dotenv()
 # Configure Gemini API
 GEMINI_API_KEY = os.getenv('GOOGLE_GENAI_API_KEY')
 
+# Event stream of the plan generation running in the current context, if any
+_event_stream: ContextVar[Optional['PlanEventStream']] = ContextVar('plan_event_stream', default=None)
+
+
+class PlanEventStream:
+    """
+    Forwards progress of a single plan generation to an event callback
+    
+    Events are emitted as ``on_event(name, data)`` with these names:
+        timeline: the timeline, as soon as generate_timeline returns
+        tool_start / tool_end: every tool call the agent makes
+        step: each step once it is final
+        done: the complete plan
+    """
+    
+    def __init__(self, on_event: Callable[[str, Dict[str, Any]], None], defer_steps: bool = False):
+        self.on_event = on_event
+        # Steps aren't final until their resources are researched
+        self.defer_steps = defer_steps
+        self.timeline_sent = False
+        self.sent_step_ids = set()
+    
+    def emit(self, event: str, data: Dict[str, Any]):
+        try:
+            self.on_event(event, data)
+        except Exception as e:
+            print(f"Error emitting {event} event: {str(e)}")
+    
+    def timeline(self, timeline: Dict[str, Any]):
+        if not self.timeline_sent and isinstance(timeline, dict):
+            self.timeline_sent = True
+            self.emit('timeline', timeline)
+    
+    def step(self, step: Any):
+        self.steps([step])
+    
+    def steps(self, steps: List[Any]):
+        for step in steps or []:
+            if isinstance(step, Step):
+                step = step.to_dict()
+            if not isinstance(step, dict):
+                continue
+            step_id = step.get('id') or step.get('title')
+            if step_id in self.sent_step_ids:
+                continue
+            self.sent_step_ids.add(step_id)
+            self.emit('step', step)
+    
+    def tool_started(self, name: str, kwargs: Dict[str, Any]):
+        self.emit('tool_start', {'tool': name, 'input': kwargs})
+    
+    def tool_finished(self, name: str, result: Any, elapsed: float, error: Optional[str] = None):
+        self.emit('tool_end', {
+            'tool': name,
+            'elapsed_ms': round(elapsed * 1000),
+            'error': error,
+            'result_count': len(result) if isinstance(result, list) else None
+        })
+        if error is None and name == 'generate_timeline':
+            self.timeline(result)
+        elif error is None and name == 'format_learning_plan' and isinstance(result, dict):
+            self.timeline(result.get('timeline'))
+            if not self.defer_steps:
+                self.steps(result.get('steps'))
+    
+    def finish(self, plan: Any):
+        """Send whatever the tools didn't already stream, then the full plan"""
+        if isinstance(plan, LearningPlan):
+            plan = plan.to_dict()
+        if isinstance(plan, dict):
+            self.timeline(plan.get('timeline'))
+            self.steps(plan.get('steps'))
+        self.emit('done', plan if isinstance(plan, dict) else {'steps': plan})
+
+
+def _traced(fn: Callable[..., Any], name: Optional[str] = None) -> Callable[..., Any]:
+    """
+    Wrap a tool function (or coroutine function) so its calls are reported to the active event stream
+    """
+    name = name or fn.__name__
+    
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            stream = _event_stream.get()
+            if stream is None:
+                return await fn(*args, **kwargs)
+            
+            stream.tool_started(name, kwargs)
+            start = time.time()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                stream.tool_finished(name, None, time.time() - start, error=str(e))
+                raise
+            stream.tool_finished(name, result, time.time() - start)
+            return result
+        
+        return async_wrapper
+    
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        stream = _event_stream.get()
+        if stream is None:
+            return fn(*args, **kwargs)
+        
+        stream.tool_started(name, kwargs)
+        start = time.time()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            stream.tool_finished(name, None, time.time() - start, error=str(e))
+            raise
+        stream.tool_finished(name, result, time.time() - start)
+        return result
+    
+    return wrapper
+
+# llama_index and the Gemini SDK take seconds to import, so they are loaded the
+# first time an LLM client or agent is needed (or by warm_up), not with this module
+_load_lock = threading.Lock()
+_llama_index_loaded = False
+
+def load_llama_index():
+    """
+    Import llama_index and the Gemini integration, and hook up LLM metrics, once
+    """
+    global _llama_index_loaded
+    with _load_lock:
+        if _llama_index_loaded:
+            return
+        start = time.time()
+        import llama_index.core.agent  # noqa: F401
+        import llama_index.llms.gemini  # noqa: F401
+        metrics.install_llm_instrumentation()
+        _llama_index_loaded = True
+        print(f"Loaded llama_index in {time.time() - start:.2f}s")
+
+# LLM clients and tools are built once per worker and shared by every request
+_shared_lock = threading.Lock()
+_llms: Dict[bool, 'Gemini'] = {}
+_tools: Dict[str, 'FunctionTool'] = {}
+
+def get_llm(json_mode: bool = False) -> 'Gemini':
+    """
+    Return the shared Gemini client, creating it on first use
+    
+    Args:
+        json_mode: Whether responses should be constrained to JSON
+    """
+    load_llama_index()
+    with _shared_lock:
+        if json_mode not in _llms:
+            from llama_index.llms.gemini import Gemini
+            _llms[json_mode] = Gemini(
+                api_key=GEMINI_API_KEY,
+                model_name=Config.LLM_MODEL,
+                temperature=Config.LLM_TEMPERATURE,
+                generation_config={'response_mime_type': 'application/json'} if json_mode else None
+            )
+        return _llms[json_mode]
+
+def get_tools(research_in_agent: bool = True) -> List['FunctionTool']:
+    """
+    Return the shared agent tools, creating them on first use
+    
+    Args:
+        research_in_agent: Include the search tools, for agents that research resources themselves
+    """
+    load_llama_index()
+    with _shared_lock:
+        if not _tools:
+            from llama_index.core.tools import FunctionTool
+            # Agents driven through achat call the async versions
+            for name, description, fn, async_fn in [
+                ("search_wikipedia", "Search Wikipedia for information related to a learning topic", search_wikipedia, search_wikipedia_async),
+                ("search_web", "Search the web for learning resources and information", search_web, search_web_async),
+                ("search_youtube", "Search YouTube for educational videos related to a topic", search_youtube, search_youtube_async),
+                ("generate_timeline", "Generate a realistic timeline based on skill levels and commitment", generate_timeline, generate_timeline_async),
+                ("format_learning_plan", "Format the complete learning plan response", format_learning_plan, format_learning_plan_async)
+            ]:
+                _tools[name] = FunctionTool.from_defaults(
+                    name=name,
+                    description=description,
+                    fn=_traced(fn, name),
+                    async_fn=_traced(async_fn, name)
+                )
+        
+        names = ["search_wikipedia", "search_web", "search_youtube"] if research_in_agent else []
+        return [_tools[name] for name in names + ["generate_timeline", "format_learning_plan"]]
+
+
+class AgentPool:
+    """
+    Pool of reusable ReAct agents, one free list per tool set
+    
+    An agent is leased by one request at a time and reset when it is returned, so
+    no chat memory leaks between requests. At most max_idle agents are kept per
+    tool set; extra ones built under load are discarded on release.
+    """
+    
+    def __init__(self, max_idle: int):
+        self.max_idle = max_idle
+        self._idle = {True: [], False: []}
+        self._lock = threading.Lock()
+    
+    def _build(self, research_in_agent: bool) -> 'ReActAgent':
+        tools = get_tools(research_in_agent)
+        from llama_index.core.agent import ReActAgent
+        return ReActAgent.from_tools(
+            tools,
+            llm=get_llm(),
+            verbose=True,
+            max_iterations=50  # Increase from default to avoid premature stopping
+        )
+    
+    @contextmanager
+    def lease(self, research_in_agent: bool = True):
+        with self._lock:
+            idle = self._idle[research_in_agent]
+            agent = idle.pop() if idle else None
+        if agent is None:
+            agent = self._build(research_in_agent)
+        try:
+            yield agent
+        finally:
+            agent.reset()
+            with self._lock:
+                idle = self._idle[research_in_agent]
+                if len(idle) < self.max_idle:
+                    idle.append(agent)
+    
+    def prefill(self, research_in_agent: bool, count: int = 1):
+        """Build agents ahead of time so the first requests don't pay for it"""
+        agents = [self._build(research_in_agent) for _ in range(count)]
+        with self._lock:
+            idle = self._idle[research_in_agent]
+            idle.extend(agents[:max(self.max_idle - len(idle), 0)])
+
+
+agent_pool = AgentPool(max_idle=Config.AGENT_POOL_SIZE)
+
+def warm_up():
+    """
+    Load llama_index and build the shared tools, and with an API key the LLM
+    clients and a first agent, before any request needs them
+    """
+    start = time.time()
+    load_llama_index()
+    get_tools()
+    if GEMINI_API_KEY:
+        get_llm()
+        get_llm(json_mode=True)
+        agent_pool.prefill(research_in_agent=not Config.PARALLEL_RESEARCH)
+    print(f"Agent warm-up finished in {time.time() - start:.2f}s")
+
 def generate_steps(
     goal: str,
     skill: str,
     skill_level: Dict[str, str],
-    commitment_level: str
-) -> Dict[str, Any]:
+    commitment_level: str,
+    on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> LearningPlan:
     """
     Generate a personalized learning plan with steps for achieving a goal using Gemini LLM.
     
+    Blocking version of generate_steps_async: the generation runs on the shared
+    event loop while the calling thread waits for it, for up to Config.PLAN_TIMEOUT
+    seconds.
+    
     Args:
         goal: User's goal statement (e.g., "I want to learn Spanish to travel South America")
         skill: The main skill to learn (e.g., "Spanish")
         skill_level: Dict with 'current' and 'target' skill levels
         commitment_level: User's commitment level
+        on_event: Optional callback receiving progress events (see PlanEventStream)
         
     Returns:
-        Complete learning plan as a dictionary
+        Complete learning plan
     """
-    # Create the Gemini LLM wrapper for llama_index
-    llm = Gemini(
-        api_key=GEMINI_API_KEY,
-        model_name=Config.LLM_MODEL,
-        temperature=Config.LLM_TEMPERATURE
-    )
-    
-    # Create function tools for the agent
-    wikipedia_tool = FunctionTool.from_defaults(
-        name="search_wikipedia",
-        description="Search Wikipedia for information related to a learning topic",
-        fn=search_wikipedia
+    return run_sync(
+        generate_steps_async(goal, skill, skill_level, commitment_level, on_event=on_event),
+        timeout=Config.PLAN_TIMEOUT
     )
+
+async def generate_steps_async(
+    goal: str,
+    skill: str,
+    skill_level: Dict[str, str],
+    commitment_level: str,
+    on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> LearningPlan:
+    """
+    Generate a personalized learning plan through the agent's async chat API
     
-    web_search_tool = FunctionTool.from_defaults(
-        name="search_web",
-        description="Search the web for learning resources and information",
-        fn=search_web
-    )
+    LLM calls, tool calls and the research phase are awaited rather than run on
+    threads, so many generations can wait on I/O at once. on_event is called on
+    the event loop and shouldn't block.
     
-    youtube_search_tool = FunctionTool.from_defaults(
-        name="search_youtube",
-        description="Search YouTube for educational videos related to a topic",
-        fn=search_youtube
-    )
+    Args:
+        goal: User's goal statement (e.g., "I want to learn Spanish to travel South America")
+        skill: The main skill to learn (e.g., "Spanish")
+        skill_level: Dict with 'current' and 'target' skill levels
+        commitment_level: User's commitment level
+        on_event: Optional callback receiving progress events (see PlanEventStream)
+        
+    Returns:
+        Complete learning plan
+    """
+    research = Config.PARALLEL_RESEARCH
+    stream = PlanEventStream(on_event, defer_steps=research) if on_event else None
+    token = _event_stream.set(stream)
+    try:
+        plan = await _generate_steps(goal, skill, skill_level, commitment_level, research_in_agent=not research)
+    finally:
+        _event_stream.reset(token)
+    plan = LearningPlan.from_dict(plan)
     
-    timeline_tool = FunctionTool.from_defaults(
-        name="generate_timeline",
-        description="Generate a realistic timeline based on skill levels and commitment",
-        fn=generate_timeline
-    )
+    # One parallel research phase instead of a search tool round-trip per step
+    if research and plan.steps:
+        await research_steps_async(plan.steps, skill, on_step=stream.step if stream else None)
     
-    format_tool = FunctionTool.from_defaults(
-        name="format_learning_plan",
-        description="Format the complete learning plan response",
-        fn=format_learning_plan
+    if stream is not None:
+        stream.finish(plan)
+    return plan
+
+def _complete_plan(
+    plan: Dict[str, Any],
+    goal: str,
+    skill: str,
+    skill_level: Dict[str, str],
+    commitment_level: str
+) -> Dict[str, Any]:
+    """
+    Fill in whatever a recovered plan is missing through format_learning_plan
+    """
+    timeline = plan.get('timeline')
+    milestones = timeline.get('milestones') if isinstance(timeline, dict) else None
+    if not isinstance(milestones, list) or not milestones or not all(isinstance(m, dict) and 'id' in m for m in milestones):
+        timeline = generate_timeline(skill_level=skill_level, commitment_level=commitment_level)
+    return format_learning_plan(
+        goal=plan.get('goal') or goal,
+        skill=plan.get('skill') or skill,
+        timeline=timeline,
+        steps=plan['steps'][:Config.MAX_STEPS]
     )
+
+async def _generate_steps(
+    goal: str,
+    skill: str,
+    skill_level: Dict[str, str],
+    commitment_level: str,
+    research_in_agent: bool = True
+) -> Dict[str, Any]:
+    # Resources are either looked up by the agent itself or in one parallel
+    # research phase once the plan is formatted
+    if research_in_agent:
+        research_instruction = "4. For each step, use the search tools (Wikipedia, web, YouTube) to find relevant resources"
+        resources_instruction = "- 2-3 resources (articles, videos, exercises) with titles and URLs"
+    else:
+        research_instruction = "4. Do NOT search for resources; they are researched separately once the plan is formatted"
+        resources_instruction = "- An empty list of resources"
     
     # Define the system prompt
     system_prompt = f"""
@@ -97,14 +421,14 @@ def generate_steps(
        - Steps should cover different aspects of learning the skill
        - For example, in learning piano, separate steps would include keyboard layout, hand positioning, rhythm practice, etc.
     3. You MUST create a TOTAL of AT LEAST 5 steps and at most {Config.MAX_STEPS} steps
-    4. For each step, use the search tools (Wikipedia, web, YouTube) to find relevant resources
+    {research_instruction}
     5. For each step, include:
        - A unique ID (e.g., "step-1", "step-2")
        - A clear, actionable task title
        - A detailed description (2-3 sentences)
        - Estimated time to complete (hours/days)
        - Difficulty level (Easy, Medium, Hard)
-       - 2-3 resources (articles, videos, exercises) with titles and URLs
+       {resources_instruction}
        - Expected outcome or how to measure completion
        - The ID of the milestone this step belongs to
     
@@ -116,23 +440,6 @@ def generate_steps(
     THE OUTPUT MUST BE A STRUCTURED JSON OBJECT, NOT PLAIN TEXT.
     """
     
-    # Create ReAct agent with our tools and LLM
-    tools = [
-        wikipedia_tool,
-        web_search_tool, 
-        youtube_search_tool,
-        timeline_tool,
-        format_tool
-    ]
-    
-    agent = ReActAgent.from_tools(
-        tools,
-        llm=llm,
-        verbose=True,
-        system_prompt=system_prompt,
-        max_iterations=50  # Increase from default to avoid premature stopping
-    )
-    
     # Define the initial query to the agent
     query = f"""
     Create a learning plan for:
@@ -143,11 +450,23 @@ def generate_steps(
     - Commitment: {commitment_level}
     
     IMPORTANT: You MUST create AT LEAST 5 distinct steps in total, not just one step per milestone.
-    You MUST use the generate_timeline tool first, then create multiple steps for each milestone, research resources for each step, and ALWAYS finish by using the format_learning_plan tool to return the plan as a structured JSON object.
+    You MUST use the generate_timeline tool first, then create multiple steps for each milestone, {'research resources for each step, ' if research_in_agent else ''}and ALWAYS finish by using the format_learning_plan tool to return the plan as a structured JSON object.
     """
     
-    # Get response from agent
-    response = agent.chat(query)
+    # Get response from a pooled agent; the system prompt is this request's only
+    # state, so it goes in as the chat history of a freshly reset agent
+    counters = metrics.PlanCounters()
+    counters_token = metrics.current_plan.set(counters)
+    try:
+        with agent_pool.lease(research_in_agent) as agent:
+            from llama_index.core.llms import ChatMessage, MessageRole
+            response = await agent.achat(
+                query,
+                chat_history=[ChatMessage(role=MessageRole.SYSTEM, content=system_prompt)]
+            )
+    finally:
+        metrics.current_plan.reset(counters_token)
+        metrics.agent_iterations.observe(counters.llm_calls)
     result = response.response
     
     # Parse if needed (depending on how the agent returns data)
@@ -155,46 +474,35 @@ def generate_steps(
         # First check if it's already a dictionary
         if isinstance(result, dict):
             return result
-            
-        # If it's a string, try to parse as JSON
-        if isinstance(result, str):
-            # Clean up the string to handle potential markdown formatting
-            if '```json' in result:
-                # Extract JSON from code blocks
-                json_match = re.search(r'```json\n(.*?)\n```', result, re.DOTALL)
-                if json_match:
-                    result = json_match.group(1).strip()
-            elif '```' in result:
-                # Extract from generic code blocks
-                json_match = re.search(r'```\n(.*?)\n```', result, re.DOTALL)
-                if json_match:
-                    result = json_match.group(1).strip()
-            
-            # Try to parse the result as JSON
-            if result.strip().startswith('{'):
-                return json.loads(result)
+        
+        # Clean JSON is the common case and needs no repair
+        try:
+            plan = json.loads(result)
+            if isinstance(plan, dict):
+                return plan
+        except ValueError:
+            pass
+        
+        # Otherwise salvage what the agent produced: the largest plan in its answer
+        # (fenced, truncated or slightly malformed), then the steps it passed to
+        # format_learning_plan along the way
+        recovered = 'answer'
+        plan = extract_plan(result)
+        if plan is None:
+            recovered = 'tool_history'
+            plan = extract_plan_from_tools(response.sources)
+        if plan is not None:
+            print(f"Warning: Agent response was not clean JSON, recovered {len(plan['steps'])} steps from the {recovered}")
+            metrics.plan_fallbacks.inc(kind=recovered)
+            return _complete_plan(plan, goal, skill, skill_level, commitment_level)
             
         # If we still don't have a parseable JSON, let's create a synthetic one
         # This is a fallback to ensure we always return a structured response
         print("Warning: Could not parse response as JSON, creating synthetic structure")
+        metrics.plan_fallbacks.inc(kind='synthetic')
         
-        # Basic extraction of milestones and steps from text
-        milestone_pattern = r'(?:Milestone|Phase|Stage)\s*\d+:?\s*([^:]+)(?:\s*\(([^)]+)\))?'
-        milestones = re.findall(milestone_pattern, result, re.IGNORECASE) or [("None to Beginner", "8 weeks")]
-        
-        step_pattern = r'(?:Step|Task)\s*\d+:?\s*([^:\n]+)'
-        steps = re.findall(step_pattern, result, re.IGNORECASE)
-        
-        # If we can't extract steps, look for bullet points
-        if not steps:
-            bullet_pattern = r'[-*•]\s*([^\n]+)'
-            steps = re.findall(bullet_pattern, result)
-            
-        # If we still don't have steps, just split by newlines and take non-empty lines
-        if not steps:
-            steps = [line.strip() for line in result.split('\n') if line.strip() and not line.startswith('#')]
-            # Limit to reasonable number of steps
-            steps = steps[:min(len(steps), 10)]
+        # Basic extraction of steps from text
+        steps = outline_lines(result)
             
         # Generate a timeline
         timeline = generate_timeline(
@@ -268,6 +576,7 @@ def generate_steps(
             
     except Exception as e:
         print(f"Error parsing agent response: {str(e)}")
+        metrics.plan_fallbacks.inc(kind='error')
         # Create a minimal valid response structure as a last resort
         return {
             "error": str(e),
@@ -303,4 +612,4 @@ if __name__ == "__main__":
     commitment_level = "Moderate"
     
     plan = generate_steps(goal, skill, skill_level, commitment_level)
-    print(json.dumps(plan, indent=2))
\ No newline at end of file
+    print(json.dumps(plan.to_dict(), indent=2))
\ No newline at end of file
@@ -1,15 +1,37 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
+import gzip
 import json
-from typing import Dict, List, Any
-import wikipediaapi
-from serpapi import GoogleSearch
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Dict, List, Any, Optional
 
 # Import agent
-from agent import generate_steps
+from admission import AdmissionRejected, admission
+from agent import PlanEventStream, generate_steps, warm_up
+from cache import plan_cache, plan_cache_key
 from config import Config
+from degrade import degrade_policy
+from fast_path import generate_steps_fast
+from jobs import DONE, FAILED, QueueFullError, job_manager
+from lanes import LaneFull, in_lane, lane_full_response, lane_stats, lanes
+import metrics
+from models import LearningPlan
+from pipeline import generate_steps_pipeline
+from plan_store import plan_store
+from research import SharedLookups
+from serp_gateway import SerpBudgetError, fallback_results, serp_gateway
+from singleflight import SingleFlight
+from tool_cache import tool_cache_stats
+from tools import generate_timeline
+from validation import ValidationError, input_schema, parse_plan_request
+from warmup import WarmUp
+import wiki_proxy
 
 load_dotenv()
 REACT_APP_PORT = os.getenv('REACT_APP_PORT', 5050)
@@ -17,186 +39,727 @@ REACT_APP_PORT = os.getenv('REACT_APP_PORT', 5050)
 app = Flask(__name__)
 CORS(app)
 
-# Initialize APIs
-wiki = wikipediaapi.Wikipedia(
-    language='en',
-    extract_format=wikipediaapi.ExtractFormat.WIKI,
-    user_agent='skill-roadmap-app/1.0 (contact@example.com)'
-)
-
-# Initialize SerpAPI
-serp_api_key = os.getenv('SERP_API_KEY')
-
-COMMITMENT_MAP = {
-    "casual": "No rush",
-    "dedicated": "Dedicated",
-    "intensive": "Intensive",
-    "moderate": "Moderate"
+# Loads the agent's dependencies in the background; readiness waits for it
+agent_warm_up = WarmUp(warm_up)
+
+# Coalesces identical plan generations that are in flight at the same time
+plan_flight = SingleFlight()
+
+# Plan engines selectable by config or by the 'engine' request field
+PLAN_ENGINES = {
+    'agent': generate_steps,
+    'pipeline': generate_steps_pipeline,
+    'fast': generate_steps_fast
 }
 
-def capitalize_level(level):
-    if not level:
-        return level
-    return level[0].upper() + level[1:].lower()
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+# Set when the worker is shutting down: in-flight plans finish, new ones are refused
+draining = threading.Event()
+
+# Endpoints that start plan generations, refused while draining
+PLAN_ENDPOINTS = {'create_learning_plan', 'stream_learning_plan', 'create_learning_plans', 'submit_plan_job'}
+
+@app.before_request
+def refuse_plans_while_draining():
+    if draining.is_set() and request.endpoint in PLAN_ENDPOINTS:
+        response = jsonify({"error": "Server is shutting down"})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
+def plans_in_flight() -> int:
+    """Plan generations running or queued in this process, in any lane, job or batch"""
+    jobs = job_manager.stats()
+    return (
+        plan_flight.stats()['in_flight'] + jobs['queued'] + jobs['running']
+        + lanes['heavy'].stats()['active'] + lanes['heavy'].stats()['queued']
+    )
+
+def drain(timeout: float) -> int:
+    """
+    Refuse new plan requests and wait up to timeout seconds for in-flight
+    generations (including background jobs and streamed plans) to finish
+
+    Returns:
+        The number of plan generations still in flight at the deadline
+    """
+    draining.set()
+    deadline = time.monotonic() + timeout
+    remaining = plans_in_flight()
+    while remaining and time.monotonic() < deadline:
+        time.sleep(0.2)
+        remaining = plans_in_flight()
+    if remaining:
+        print(f"Shutting down with {remaining} plan generations still in flight")
+    else:
+        print("All in-flight plan generations finished")
+    return remaining
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # The route template, not the raw path, keeps label cardinality bounded
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.http_request_duration.observe(
+            time.perf_counter() - started,
+            endpoint=endpoint, method=request.method, status=response.status_code
+        )
+    return response
+
+@app.after_request
+def compress_response(response):
+    """
+    Gzip (or deflate) buffered responses for clients that accept it
+    
+    Streamed responses (SSE and NDJSON) are sent as is, so that every event is
+    flushed to the client as soon as it is written.
+    """
+    if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+            or 'Content-Encoding' in response.headers):
+        return response
+    accepted = request.accept_encodings
+    encoding = next((e for e in ('gzip', 'deflate') if accepted[e]), None)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < Config.COMPRESS_MIN_SIZE:
+        return response
+    if encoding == 'gzip':
+        data = gzip.compress(data, compresslevel=Config.COMPRESS_LEVEL)
+    else:
+        data = zlib.compress(data, Config.COMPRESS_LEVEL)
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+metrics.registry.register(metrics.Gauge(
+    'plan_cache_events', 'Plan cache lookups and evictions by tier',
+    lambda: {
+        (tier, event): stats[event]
+        for tier, stats in plan_cache.snapshot()['tiers'].items()
+        for event in ('hits', 'misses', 'evictions')
+    },
+    ['tier', 'event']
+))
+metrics.registry.register(metrics.Gauge(
+    'plan_requests_coalesced', 'Plan requests served by another in-flight generation',
+    lambda: {(): plan_flight.stats()['coalesced']}
+))
+metrics.registry.register(metrics.Gauge(
+    'plan_jobs', 'Background plan jobs by state',
+    lambda: {(state,): count for state, count in job_manager.stats().items()},
+    ['state']
+))
+
+@app.route('/api/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Metrics in the Prometheus text exposition format
+    """
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/health', methods=['GET'])
+@app.route('/api/health/live', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy"}), 200
+    """
+    Liveness: answers as long as the process can serve requests, with the load
+    of each executor lane for information; it never waits on a lane
+    """
+    return jsonify({"status": "healthy", "lanes": lane_stats()}), 200
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness_check():
+    """
+    Readiness: 503 while shutting down, until the agent warm-up has finished (if
+    it was started) and while any executor lane is full, so new traffic goes to
+    other instances until this one can take it
+    """
+    stats = lane_stats()
+    saturated = [name for name, lane in stats.items() if lane['full']]
+    body = {"status": "ready", "lanes": stats, "warm_up": agent_warm_up.status()}
+    if draining.is_set():
+        body["status"] = "draining"
+        return jsonify(body), 503
+    if not agent_warm_up.ready:
+        body["status"] = "warming_up"
+        return jsonify(body), 503
+    if saturated:
+        body["status"] = "saturated"
+        body["saturated"] = saturated
+        return jsonify(body), 503
+    return jsonify(body), 200
 
 @app.route('/api/wiki/page/<title>', methods=['GET'])
+@in_lane('light')
 def get_wikipedia_page(title):
     """
     Get Wikipedia page content by title
+    
+    Query parameters: fields (comma-separated, any of title, summary, text, url,
+    sections and revision; default title,summary,text,url) and section (an index
+    or heading, to return only that section as text). Pages are served from the
+    page cache and support If-None-Match.
     """
-    page = wiki.page(title)
-    if page.exists():
-        return jsonify({
-            'title': page.title,
-            'summary': page.summary,
-            'text': page.text,
-            'url': page.fullurl
-        })
-    else:
+    fields = [f.strip() for f in request.args.get('fields', 'title,summary,text,url').split(',') if f.strip()]
+    unknown = [f for f in fields if f not in wiki_proxy.PAGE_FIELDS]
+    if unknown or not fields:
+        return jsonify({"error": f"fields must be a comma-separated list of: {', '.join(wiki_proxy.PAGE_FIELDS)}"}), 400
+    section = request.args.get('section')
+
+    try:
+        if section is None and set(fields) <= set(wiki_proxy.SUMMARY_FIELDS):
+            # Summaries are a much smaller upstream request than the full text
+            summary = wiki_proxy.get_summary(title)
+            body = {field: summary[field] for field in fields} if summary else None
+        else:
+            page = wiki_proxy.get_page(title)
+            body = None
+            if page is not None:
+                selected = wiki_proxy.find_section(page, section) if section is not None else None
+                if section is not None and selected is None:
+                    return jsonify({"error": "Section not found"}), 404
+                body = wiki_proxy.render_page(page, fields, selected)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 502
+
+    if body is None:
         return jsonify({"error": "Page not found"}), 404
+    return conditional_json(body)
 
 @app.route('/api/wiki/search', methods=['GET'])
+@in_lane('light')
 def search_wikipedia():
     """
     Search Wikipedia for a given query
+    
+    Query parameters: query, and limit (default 10)
     """
-    query = request.args.get('query', '')
+    query = request.args.get('query', '').strip()
     if not query:
         return jsonify({"error": "Query parameter is required"}), 400
-    
-    search_results = wiki.opensearch(query)
-    return jsonify({
-        'results': [
-            {
-                'title': result[0],
-                'summary': result[1],
-                'url': result[2]
-            }
-            for result in search_results
-        ]
-    })
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, Config.WIKI_SEARCH_MAX_RESULTS))
+
+    try:
+        results = wiki_proxy.search(query, limit)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 502
+    return conditional_json({'results': results})
+
+def conditional_json(body: Dict[str, Any]) -> Response:
+    """
+    JSON response with a weak ETag and Cache-Control, answered with 304 Not
+    Modified when the client's If-None-Match already matches
+    """
+    response = jsonify(body)
+    response.add_etag(weak=True)
+    response.headers['Cache-Control'] = f"public, max-age={Config.WIKI_HTTP_MAX_AGE}"
+    return response.make_conditional(request)
 
 @app.route('/api/serp/search', methods=['GET'])
+@in_lane('light')
 def search_serp():
     """
     Search using SerpAPI
+    
+    Goes through the SerpAPI gateway; when it won't spend a search (rate limit or
+    daily budget), the configured fallback results are returned with 'degraded'
+    set to the reason.
     """
     query = request.args.get('query', '')
     if not query:
         return jsonify({"error": "Query parameter is required"}), 400
 
-    search_params = {
-        "q": query,
-        "api_key": serp_api_key,
-        "num": 10  # Number of results to return
-    }
-
+    degraded = None
     try:
-        search = GoogleSearch(search_params)
-        results = search.get_dict()
-        
-        # Extract relevant information from results
-        organic_results = []
-        if 'organic_results' in results:
-            for result in results['organic_results']:
-                organic_results.append({
-                    'title': result.get('title', ''),
-                    'link': result.get('link', ''),
-                    'snippet': result.get('snippet', ''),
-                    'position': result.get('position', None)
-                })
-
-        return jsonify({
-            'query': query,
-            'results': organic_results,
-            'total_results': len(organic_results)
-        })
+        organic_results = serp_gateway.search(query, 10)  # Number of results to return
+    except SerpBudgetError as e:
+        degraded = e.reason
+        organic_results = fallback_results(query, 10)
     except Exception as e:
         return jsonify({
             "error": str(e)
         }), 500
 
+    body = {
+        'query': query,
+        'results': organic_results,
+        'total_results': len(organic_results)
+    }
+    if degraded:
+        body['degraded'] = degraded
+    return jsonify(body)
+
+def plan_engine(data: Dict[str, Any]) -> str:
+    """
+    Name of the plan engine requested in the body, or the configured default
+    """
+    engine = (data.get('engine') or Config.PLAN_ENGINE).lower()
+    if engine not in PLAN_ENGINES:
+        raise ValueError(f"Unknown plan engine '{engine}', expected one of: {', '.join(PLAN_ENGINES)}")
+    return engine
+
+def build_plan(formatted_input: Dict[str, Any], engine: str = 'agent', on_event=None, client: Optional[str] = None,
+               **engine_kwargs) -> LearningPlan:
+    """
+    Return the learning plan for the given inputs, from the plan cache when possible
+    
+    Identical requests that arrive while a plan is being generated wait for that
+    generation instead of starting their own. When the LLM is unavailable or
+    overloaded (see DegradePolicy), a cache miss gets a fast-path plan flagged as
+    degraded instead. on_event receives the same progress events as
+    generate_steps; a cached, shared or degraded plan is replayed through it in one go.
+    
+    With a client, an LLM generation first waits for a slot from admission
+    control, which raises AdmissionRejected if it can't get one. Only the client
+    leading a coalesced generation is admitted; when it is turned away, callers
+    from other clients that were waiting on it start (or join) the generation
+    again rather than share a rejection that wasn't theirs.
+    
+    Any engine_kwargs are passed on to the engine when this call generates the plan.
+    """
+    cache_key = plan_cache_key(formatted_input, engine)
+    learning_plan = plan_cache.get(cache_key)
+    if learning_plan is None and engine != 'fast' and Config.DEGRADE_ENABLED:
+        reason = degrade_policy.reason(plan_flight.stats()['in_flight'] + job_manager.queue_depth())
+        if reason is not None:
+            learning_plan = degraded_plan(formatted_input, reason)
+            if on_event is not None:
+                PlanEventStream(on_event).finish(learning_plan)
+            return learning_plan
+    if learning_plan is not None:
+        print('plan cache hit')
+        shared = True
+    while learning_plan is None:
+        try:
+            learning_plan, shared = plan_flight.do(
+                cache_key, admit_and_generate, client, cache_key, formatted_input, engine, on_event, **engine_kwargs
+            )
+        except AdmissionRejected as e:
+            if e.client == client:
+                raise
+            print('coalesced plan generation was not admitted, retrying')
+            continue
+        if shared:
+            print('coalesced with in-flight plan generation')
+    if shared and on_event is not None:
+        PlanEventStream(on_event).finish(learning_plan)
+    return learning_plan
+
+def degraded_plan(formatted_input: Dict[str, Any], reason: str) -> LearningPlan:
+    """
+    Build a fast-path plan in place of an LLM one; it is not cached, so the next
+    request after the load drops gets a full plan
+    """
+    print(f"Serving degraded plan ({reason})")
+    metrics.plans_degraded.inc(reason=reason)
+    learning_plan = generate_steps_fast(**formatted_input)
+    learning_plan.degraded = reason
+    return learning_plan
+
+def admit_and_generate(client: Optional[str], cache_key: str, formatted_input: Dict[str, Any], engine: str, on_event=None,
+                       **engine_kwargs) -> LearningPlan:
+    if client is None or engine == 'fast':
+        return generate_and_cache_plan(cache_key, formatted_input, engine, on_event, **engine_kwargs)
+    with admission.admit(client):
+        return generate_and_cache_plan(cache_key, formatted_input, engine, on_event, **engine_kwargs)
+
+def generate_and_cache_plan(cache_key: str, formatted_input: Dict[str, Any], engine: str, on_event=None, **engine_kwargs) -> LearningPlan:
+    start = time.perf_counter()
+    try:
+        learning_plan = PLAN_ENGINES[engine](**formatted_input, on_event=on_event, **engine_kwargs)
+    except Exception:
+        metrics.plans_generated.inc(engine=engine, outcome='error')
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.plan_duration.observe(elapsed, engine=engine)
+        if engine != 'fast':
+            degrade_policy.record(elapsed)
+    metrics.plans_generated.inc(engine=engine, outcome='fallback' if learning_plan.error else 'ok')
+    if learning_plan.steps:
+        # Stored once per generation; the id travels with the cached plan to later hits
+        learning_plan.id = store_plan(learning_plan)
+    # Don't cache the last-resort plan produced when the agent errors out
+    if learning_plan.steps and learning_plan.error is None:
+        plan_cache.set(cache_key, learning_plan)
+    return learning_plan
+
+def validation_error_response(error: ValidationError):
+    return jsonify({"error": "Invalid request", "errors": error.errors}), 400
+
+def admission_rejected_response(error: AdmissionRejected):
+    response = jsonify({"error": str(error), "reason": error.reason, "retry_after": error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, error.status
+
+def store_plan(learning_plan: LearningPlan) -> Optional[str]:
+    """
+    Persist a plan so it can be fetched again without regenerating it
+
+    Returns:
+        The stored plan's id, or None if it couldn't be stored
+    """
+    try:
+        return plan_store.save(learning_plan)
+    except Exception as e:
+        print(f"Error storing plan: {str(e)}")
+        return None
+
+def plan_steps_response(learning_plan: LearningPlan):
+    if not learning_plan.steps:
+        return jsonify({"error": "Could not generate steps"}), 500
+    # Plans stay objects until here, where they are serialized once
+    response = jsonify([step.to_dict() for step in learning_plan.steps])
+    # The body is a bare list of steps, so the plan id and degraded flag travel in headers
+    if learning_plan.id is not None:
+        response.headers['X-Plan-Id'] = learning_plan.id
+    if learning_plan.degraded:
+        response.headers['X-Plan-Degraded'] = learning_plan.degraded
+        response.headers['X-Plan-Engine'] = 'fast'
+    return response
+
 # New endpoints for the Goal Planner
 @app.route('/api/goal-planner/create-plan', methods=['POST'])
+@in_lane('heavy')
 def create_learning_plan():
     print('received from front')
     try:
-        data = request.json
-        skill = data.get('skill', '')
-        goal_reason = data.get('goalReason', '')
-        full_goal = f"I want to learn {skill} to {goal_reason}"
-        commitment = COMMITMENT_MAP.get(data['commitment'].lower(), data['commitment'])
-        formatted_input = {
-            'goal': full_goal,
-            'skill': skill,
-            'skill_level': {
-                'current': capitalize_level(data['currentLevel']),
-                'target': capitalize_level(data['targetLevel'])
-            },
-            'commitment_level': commitment
-        }
-        learning_plan = generate_steps(**formatted_input)
-        if isinstance(learning_plan, dict) and 'steps' in learning_plan:
-            return jsonify(learning_plan['steps'])
-        elif isinstance(learning_plan, list):
-            return jsonify(learning_plan)
-        else:
-            return jsonify({"error": "Could not generate steps"}), 500
+        data = request.get_json(silent=True)
+        # Rejects bad input before any agent or network work starts
+        formatted_input = parse_plan_request(data)
+        engine = plan_engine(data)
+        learning_plan = build_plan(formatted_input, engine, client=request.remote_addr or 'unknown')
+        response = plan_steps_response(learning_plan)
+        if not isinstance(response, tuple):
+            response.headers.setdefault('X-Plan-Engine', engine)
+        return response
+    except ValidationError as e:
+        return validation_error_response(e)
+    except AdmissionRejected as e:
+        return admission_rejected_response(e)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error creating learning plan: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/goal-planner/validate-inputs', methods=['POST'])
-def validate_inputs():
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/goal-planner/create-plan/stream', methods=['GET', 'POST'])
+def stream_learning_plan():
     """
-    Validate user inputs before creating a full plan
+    Create a learning plan and stream its progress as Server-Sent Events
+    
+    Emits timeline, tool_start, tool_end and step events while the agent works,
+    then a final done (or error) event, and a saved event with the stored plan's
+    id. Accepts a JSON body, or query parameters so that it can be used with
+    EventSource.
     """
     try:
-        data = request.json
-        
-        # Define valid options
-        valid_levels = Config.VALID_SKILL_LEVELS
-        valid_commitments = Config.VALID_COMMITMENT_LEVELS
-        
-        # Validate inputs
-        errors = []
-        
-        if 'currentLevel' not in data or data['currentLevel'] not in valid_levels:
-            errors.append("Invalid current level")
-        
-        if 'targetLevel' not in data or data['targetLevel'] not in valid_levels:
-            errors.append("Invalid target level")
-            
-        if 'commitment' not in data or data['commitment'] not in valid_commitments:
-            errors.append("Invalid commitment level")
-            
-        if 'goal' not in data or not data['goal'].strip():
-            errors.append("Goal is required")
-            
-        if 'skill' not in data or not data['skill'].strip():
-            errors.append("Skill is required")
-            
-        # Check if target level is higher than current level
-        if ('currentLevel' in data and 'targetLevel' in data and 
-            valid_levels.index(data['currentLevel']) >= valid_levels.index(data['targetLevel'])):
-            errors.append("Target level must be higher than current level")
-        
-        if errors:
-            return jsonify({"valid": False, "errors": errors}), 400
-        else:
-            return jsonify({"valid": True})
-        
+        data = request.get_json(silent=True) or request.args.to_dict()
+        formatted_input = parse_plan_request(data)
+        engine = plan_engine(data)
+    except ValidationError as e:
+        return validation_error_response(e)
+    except Exception as e:
+        return jsonify({"error": f"Invalid request: {str(e)}"}), 400
+    
+    events = queue.Queue()
+    client = request.remote_addr or 'unknown'
+    # Set once the response is closed, i.e. fully sent or abandoned
+    sent = threading.Event()
+    
+    def produce():
+        try:
+            learning_plan = build_plan(
+                formatted_input, engine, on_event=lambda event, data: events.put((event, data)), client=client
+            )
+            if learning_plan.id is not None:
+                events.put(('saved', {'plan_id': learning_plan.id}))
+        except AdmissionRejected as e:
+            events.put(('error', {'error': str(e), 'reason': e.reason, 'retry_after': e.retry_after}))
+        except Exception as e:
+            print(f"Error streaming learning plan: {str(e)}")
+            events.put(('error', {'error': str(e)}))
+        finally:
+            events.put(None)
+            # The request thread is busy until the client has read every event, so
+            # the lane slot is held until then and the lane accounts for that thread
+            sent.wait(Config.WEB_TIMEOUT)
+    
+    try:
+        lanes['heavy'].submit(produce)
+    except LaneFull as e:
+        return lane_full_response(e)
+    
+    def generate():
+        try:
+            while True:
+                try:
+                    item = events.get(timeout=15)
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    break
+                yield sse_event(*item)
+        finally:
+            sent.set()
+    
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # The generator's finally only runs once it has started, so also release the
+    # slot when the server closes the response, e.g. when the client went away
+    # before the first event
+    response.call_on_close(sent.set)
+    return response
+
+@app.route('/api/goal-planner/create-plans', methods=['POST'])
+def create_learning_plans():
+    """
+    Create learning plans for a batch of requests, streamed back as NDJSON
+    
+    Expects {"plans": [<create-plan body>, ...]}. Identical inputs are generated
+    once, all timelines are computed up front and resource lookups are shared
+    between plans whose steps overlap. Plans always use the pipeline engine, since
+    it is the one that accepts a precomputed timeline and shared lookups. Each line
+    of the response is {"indices": [...], "steps": [...], "plan_id": ...} (or
+    "error") and is sent as soon as that plan is ready. Like create-plan, a plan is
+    served degraded (with "degraded" set to the reason) while the LLM is
+    unavailable or overloaded.
+    
+    Plans run on the heavy lane, at most Config.BATCH_WORKERS at a time. A batch
+    that can't start one is answered with 503; one that finds the lane full later,
+    with none of its own plans left running, reports its remaining plans as errors
+    with a retry_after.
+    
+    Each generated plan goes through admission control for the requesting client,
+    like create-plan, so a batch never runs more plans at once than the client's
+    share of slots; a plan that isn't admitted is reported as an error with the
+    reason and a retry_after.
+    """
+    data = request.get_json(silent=True)
+    items = data.get('plans') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "A non-empty 'plans' list is required"}), 400
+    if len(items) > Config.BATCH_MAX_PLANS:
+        return jsonify({"error": f"At most {Config.BATCH_MAX_PLANS} plans per batch"}), 400
+    
+    engine = 'pipeline'
+    groups = {}
+    invalid = []
+    for index, item in enumerate(items):
+        try:
+            formatted_input = parse_plan_request(item)
+        except ValidationError as e:
+            invalid.append({'indices': [index], 'error': "Invalid request", 'errors': e.errors})
+            continue
+        cache_key = plan_cache_key(formatted_input, engine)
+        groups.setdefault(cache_key, (formatted_input, []))[1].append(index)
+    
+    timelines = {}
+    for formatted_input, _ in groups.values():
+        timeline_key = json.dumps([formatted_input['skill_level'], formatted_input['commitment_level']])
+        if timeline_key not in timelines:
+            timelines[timeline_key] = generate_timeline(
+                skill_level=formatted_input['skill_level'],
+                commitment_level=formatted_input['commitment_level']
+            )
+    lookups = SharedLookups()
+    
+    client = request.remote_addr or 'unknown'
+    batch_workers = min(Config.BATCH_WORKERS, Config.ADMISSION_MAX_PER_CLIENT)
+    
+    def run(formatted_input):
+        timeline_key = json.dumps([formatted_input['skill_level'], formatted_input['commitment_level']])
+        return build_plan(
+            formatted_input, engine, client=client,
+            # Each plan gets its own copy since format_learning_plan doesn't copy it
+            timeline=json.loads(json.dumps(timelines[timeline_key])),
+            lookups=lookups
+        )
+    
+    waiting = list(groups.items())
+    running = {}
+    
+    def submit_next():
+        _, (formatted_input, indices) = waiting[0]
+        running[lanes['heavy'].submit(run, formatted_input)] = indices
+        waiting.pop(0)
+    
+    if waiting:
+        try:
+            submit_next()
+        except LaneFull as e:
+            return lane_full_response(e)
+    
+    def generate():
+        for line in invalid:
+            yield json.dumps(line) + "\n"
+        while running or waiting:
+            try:
+                while waiting and len(running) < batch_workers:
+                    submit_next()
+            except LaneFull as e:
+                if not running:
+                    # None of this batch's plans to wait for, so the lane is busy with other requests
+                    for _, (_, indices) in waiting:
+                        yield json.dumps({'indices': indices, 'error': str(e), 'retry_after': e.retry_after}) + "\n"
+                    waiting.clear()
+                    break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                indices = running.pop(future)
+                try:
+                    learning_plan = future.result()
+                    line = {'indices': indices, 'steps': [step.to_dict() for step in learning_plan.steps]}
+                    if learning_plan.id is not None:
+                        line['plan_id'] = learning_plan.id
+                    if learning_plan.degraded:
+                        line['degraded'] = learning_plan.degraded
+                except AdmissionRejected as e:
+                    line = {'indices': indices, 'error': str(e), 'reason': e.reason, 'retry_after': e.retry_after}
+                except Exception as e:
+                    print(f"Error creating batch plan: {str(e)}")
+                    line = {'indices': indices, 'error': str(e)}
+                yield json.dumps(line) + "\n"
+        print(f"Batch done: {len(items)} requests, {len(groups)} unique plans, "
+              f"{lookups.executed}/{lookups.requested} lookups executed")
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/goal-planner/jobs', methods=['POST'])
+@in_lane('light')
+def submit_plan_job():
+    """
+    Queue a plan generation and return its job id without waiting for the agent
+    
+    The job waits for admission like create-plan does; if it isn't admitted, it
+    fails with the reason.
+    """
+    try:
+        data = request.get_json(silent=True)
+        formatted_input = parse_plan_request(data)
+        engine = plan_engine(data)
+        job = job_manager.submit(build_plan, formatted_input, engine, client=request.remote_addr or 'unknown')
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 429
+    except ValidationError as e:
+        return validation_error_response(e)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
+        print(f"Error submitting plan job: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+    response = job.to_dict()
+    response['status_url'] = f"/api/goal-planner/jobs/{job.id}"
+    response['result_url'] = f"/api/goal-planner/jobs/{job.id}/result"
+    return jsonify(response), 202
+
+@app.route('/api/goal-planner/jobs/<job_id>', methods=['GET'])
+@in_lane('light')
+def get_plan_job(job_id):
+    """
+    Poll the status of a plan job
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found or expired"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/goal-planner/jobs/<job_id>/result', methods=['GET'])
+@in_lane('light')
+def get_plan_job_result(job_id):
+    """
+    Fetch the steps of a finished plan job
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found or expired"}), 404
+    if job.status == FAILED:
+        return jsonify({"error": job.error}), 500
+    if job.status != DONE:
+        return jsonify(job.to_dict()), 202
+    return plan_steps_response(job.result)
+
+@app.route('/api/cache/stats', methods=['GET'])
+@in_lane('light')
+def cache_stats():
+    """
+    Hit/miss/eviction counters for the plan and tool caches, plan coalescing counts
+    and today's SerpAPI budget
+    """
+    return jsonify({
+        'plan_cache': plan_cache.snapshot(),
+        'tool_cache': tool_cache_stats(),
+        'plan_coalescing': plan_flight.stats(),
+        'serp_budget': serp_gateway.status()
+    })
+
+@app.route('/api/goal-planner/plans/<plan_id>', methods=['GET'])
+@in_lane('light')
+def get_stored_plan(plan_id):
+    """
+    Fetch a previously generated plan by id; never regenerates it
+    """
+    learning_plan = plan_store.get(plan_id)
+    if learning_plan is None:
+        return jsonify({"error": "Plan not found"}), 404
+    return jsonify(learning_plan.to_dict())
+
+@app.route('/api/goal-planner/plans', methods=['GET'])
+@in_lane('light')
+def list_stored_plans():
+    """
+    List stored plans, newest first
+    
+    Query parameters: skill (optional), limit (default 20) and before (a created_at
+    timestamp from the previous page)
+    """
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be positive"}), 400
+    plans = plan_store.list(
+        skill=request.args.get('skill'),
+        limit=min(limit, Config.PLAN_LIST_MAX),
+        before=request.args.get('before')
+    )
+    return jsonify({'plans': plans})
+
+@app.route('/api/goal-planner/validate-inputs', methods=['POST'])
+@in_lane('light')
+def validate_inputs():
+    """
+    Validate user inputs before creating a full plan
+    """
+    _, errors = input_schema.validate(request.get_json(silent=True))
+    if errors:
+        return jsonify({"valid": False, "errors": errors}), 400
+    return jsonify({"valid": True})
+
 if __name__ == '__main__':
     # Check if required API keys are present
     if not Config.GOOGLE_GENAI_API_KEY:
         print("WARNING: No Gemini API key found. The application will not function correctly without it.")
+    if Config.WARM_UP:
+        agent_warm_up.start()
     
     port = int(REACT_APP_PORT) if REACT_APP_PORT else 5050
     app.run(debug=True, host='0.0.0.0', port=port)
\ No newline at end of file
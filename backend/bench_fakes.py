@@ -0,0 +1,252 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Sequence
+from urllib.parse import parse_qs, urlsplit
+
+from llama_index.core.base.llms.generic_utils import acompletion_to_chat_decorator
+from llama_index.core.llms import ChatMessage, ChatResponse, CompletionResponse, CustomLLM, LLMMetadata
+from llama_index.core.llms.callbacks import llm_chat_callback, llm_completion_callback
+
+
+class FakeUpstreamServer:
+    """
+    Threaded local HTTP server faking SerpAPI, YouTube and MediaWiki
+
+    Routes:
+        /search.json          SerpAPI Google search
+        /youtube/v3/search    YouTube Data API search
+        /w/api.php            MediaWiki action=query and action=opensearch
+
+    Args:
+        latency: Seconds each response is delayed
+        error_rate: Fraction of requests answered with HTTP 500
+    """
+
+    def __init__(self, latency: float = 0.05, error_rate: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                time.sleep(server.latency)
+                if random.random() < server.error_rate:
+                    self._send(500, {'error': 'injected failure'})
+                    return
+                url = urlsplit(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if url.path == '/search.json':
+                    self._send(200, fake_serp(params))
+                elif url.path == '/youtube/v3/search':
+                    self._send(200, fake_youtube(params))
+                elif url.path == '/w/api.php':
+                    self._send(200, fake_mediawiki(params))
+                else:
+                    self._send(404, {'error': 'not found'})
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeUpstreamServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def env(self) -> Dict[str, str]:
+        """Environment overrides pointing the app's upstream URLs at this server"""
+        return {
+            'SERP_API_URL': f"{self.base_url}/search.json",
+            'YOUTUBE_API_URL': f"{self.base_url}/youtube/v3/search",
+            'WIKIPEDIA_API_URL': f"{self.base_url}/w/api.php",
+            'SERP_API_KEY': 'benchmark',
+            'YOUTUBE_API_KEY': 'benchmark'
+        }
+
+
+def fake_serp(params: Dict[str, str]) -> Dict[str, Any]:
+    query = params.get('q', '')
+    return {'organic_results': [
+        {
+            'position': i + 1,
+            'title': f"{query} guide {i + 1}",
+            'link': f"https://example.org/{query.replace(' ', '-')}/{i + 1}",
+            'snippet': f"Everything about {query}. " * 5
+        }
+        for i in range(int(params.get('num', 10)))
+    ]}
+
+
+def fake_youtube(params: Dict[str, str]) -> Dict[str, Any]:
+    query = params.get('q', '')
+    return {'items': [
+        {
+            'id': {'videoId': f"vid{i}{abs(hash(query)) % 10000}"},
+            'snippet': {
+                'title': f"{query} video {i + 1}",
+                'description': f"Learn {query} step by step.",
+                'thumbnails': {'medium': {'url': f"https://i.example.org/{i}.jpg"}}
+            }
+        }
+        for i in range(int(params.get('maxResults', 3)))
+    ]}
+
+
+def _fake_page(title: str) -> Dict[str, Any]:
+    return {
+        'title': title,
+        'extract': f"{title} is a topic. " * 40,
+        'fullurl': f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}"
+    }
+
+
+def _fake_full_page(title: str) -> Dict[str, Any]:
+    sections = ''.join(
+        f"\n\n== Part {i} ==\n{title} part {i}. " + f"Detail about {title}. " * 60
+        + f"\n\n=== Part {i} notes ===\nNotes on part {i}."
+        for i in range(1, 4)
+    )
+    return dict(_fake_page(title), extract=f"{title} is a topic." + sections, lastrevid=1000 + len(title))
+
+
+def fake_mediawiki(params: Dict[str, str]) -> Any:
+    if params.get('action') == 'opensearch':
+        query = params.get('search', '')
+        titles = [f"{query} {i}" for i in range(int(params.get('limit', 10)))]
+        return [query, titles, ['' for _ in titles], [_fake_page(t)['fullurl'] for t in titles]]
+
+    if params.get('generator') == 'links':
+        limit = int(params.get('gpllimit', 10))
+        return {'query': {'pages': [_fake_page(f"{params.get('titles', '')} link {i}") for i in range(limit)]}}
+    if params.get('generator') == 'search':
+        query = params.get('gsrsearch', '')
+        pages = [dict(_fake_page(f"{query} {i}"), index=i + 1) for i in range(int(params.get('gsrlimit', 10)))]
+        return {'query': {'pages': pages[::-1]}}
+    if params.get('list') == 'search':
+        query = params.get('srsearch', '')
+        return {'query': {'search': [
+            {'title': f"{query} {i}", 'snippet': f"About {query}"} for i in range(int(params.get('srlimit', 10)))
+        ]}}
+
+    # Every title "exists" except the "... learning" fallback
+    pages = []
+    for title in params.get('titles', '').split('|'):
+        if title.endswith(' learning'):
+            pages.append({'title': title, 'missing': True})
+        elif params.get('exintro'):
+            pages.append(_fake_page(title))
+        else:
+            pages.append(_fake_full_page(title))
+    return {'query': {'pages': pages}}
+
+
+def _fake_steps(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            'title': f"Practice technique {i + 1}",
+            'description': f"Work through exercise set {i + 1}. Repeat until it feels natural.",
+            'time_estimate': '1 week',
+            'difficulty': ['Easy', 'Medium', 'Hard'][min(i // 4, 2)],
+            'expected_outcome': f"Comfortable with technique {i + 1}",
+            'milestone_id': f"milestone-{i // 4 + 1}"
+        }
+        for i in range(count)
+    ]
+
+
+class ScriptedLLM(CustomLLM):
+    """
+    Stand-in for Gemini that follows a fixed ReAct script
+
+    The agent is walked through generate_timeline, then (if the search tools are
+    available) one call to each search tool, then a final JSON answer. Prompts that
+    ask for a JSON step skeleton (the pipeline engine) get one directly.
+    """
+
+    latency: float = 0.2
+    error_rate: float = 0.0
+    steps: int = 8
+    calls: int = 0
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(model_name='scripted', is_chat_model=False)
+
+    def _script(self, prompt: str) -> str:
+        if 'Respond with ONLY a JSON object' in prompt:
+            return json.dumps({'steps': _fake_steps(self.steps)})
+
+        conversation = prompt.split('## Current Conversation', 1)[-1]
+        stage = conversation.count('Observation:')
+        actions = [('generate_timeline', {
+            'skill_level': {'current': 'None', 'target': 'Intermediate'},
+            'commitment_level': 'Moderate'
+        })]
+        if 'search_web' in prompt:
+            actions += [
+                ('search_wikipedia', {'query': 'piano', 'max_results': 2}),
+                ('search_web', {'query': 'piano basics', 'max_results': 3}),
+                ('search_youtube', {'query': 'piano basics', 'max_results': 2})
+            ]
+        if stage < len(actions):
+            name, args = actions[stage]
+            return f"Thought: I need to use a tool.\nAction: {name}\nAction Input: {json.dumps(args)}"
+
+        steps = [dict(step, id=f"step-{i + 1}", resources=[]) for i, step in enumerate(_fake_steps(self.steps))]
+        plan = {'goal': 'benchmark', 'skill': 'piano', 'timeline': {'milestones': []}, 'steps': steps}
+        return f"Thought: I can answer without using any more tools.\nAnswer: {json.dumps(plan)}"
+
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        self.calls += 1
+        time.sleep(self.latency)
+        if random.random() < self.error_rate:
+            raise RuntimeError('injected LLM failure')
+        return CompletionResponse(text=self._script(prompt))
+
+    @llm_completion_callback()
+    async def acomplete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        # CustomLLM's async methods call the blocking ones, which would stall the event loop
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if random.random() < self.error_rate:
+            raise RuntimeError('injected LLM failure')
+        return CompletionResponse(text=self._script(prompt))
+
+    @llm_chat_callback()
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        return await acompletion_to_chat_decorator(self.acomplete)(messages, **kwargs)
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any):
+        response = self.complete(prompt, formatted=formatted, **kwargs)
+        yield CompletionResponse(text=response.text, delta=response.text)
@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from bench_fakes import FakeUpstreamServer, ScriptedLLM
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def run_scenario(name: str, fn: Callable[[int], Any], concurrency: int, iterations: int) -> Dict[str, Any]:
+    """
+    Call fn(i) `iterations` times from `concurrency` threads and summarize the run
+
+    Returns:
+        Dict with latency percentiles (ms), throughput (calls/s), error count and
+        peak traced Python memory (MB)
+    """
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def call(i):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            fn(i)
+            failed = False
+        except Exception as e:
+            print(f"{name} error: {str(e)}")
+            failed = True
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            errors += failed
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, range(iterations)))
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    result = {
+        'scenario': name,
+        'concurrency': concurrency,
+        'iterations': iterations,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2) if latencies else 0.0,
+        'throughput_per_s': round(iterations / wall, 2) if wall else 0.0,
+        'peak_memory_mb': round(peak / (1024 * 1024), 2)
+    }
+    print(f"{name:<40} c={concurrency:<3} p50={result['p50_ms']:>9}ms p95={result['p95_ms']:>9}ms "
+          f"p99={result['p99_ms']:>9}ms {result['throughput_per_s']:>8}/s errors={errors}")
+    return result
+
+
+def plan_body(i: int, engine: str) -> Dict[str, Any]:
+    # A unique goal per request keeps the plan cache from answering
+    return {
+        'skill': 'piano',
+        'goalReason': f"play song {uuid.uuid4().hex[:8]} {i}",
+        'currentLevel': 'none',
+        'targetLevel': 'intermediate',
+        'commitment': 'moderate',
+        'engine': engine
+    }
+
+
+# Each snippet runs in a fresh interpreter, so the timings are cold imports
+IMPORT_SNIPPETS = {
+    'app': "import app",
+    'llama_index': "import agent; agent.load_llama_index()",
+    'warm_up': "import agent; agent.GEMINI_API_KEY = None; agent.warm_up()"
+}
+
+
+def measure_import_seconds() -> Dict[str, float]:
+    """
+    Cold-start cost of importing the app and of loading the agent's dependencies
+
+    The benchmark process itself already has llama_index loaded (for the
+    scripted LLM), so each measurement runs in a subprocess.
+    """
+    seconds = {}
+    for name, snippet in IMPORT_SNIPPETS.items():
+        code = f"import time; start = time.perf_counter(); {snippet}; print(time.perf_counter() - start)"
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True
+        )
+        lines = result.stdout.strip().splitlines()
+        seconds[name] = round(float(lines[-1]), 3) if result.returncode == 0 and lines else None
+    return seconds
+
+
+def build_scenarios(app_module, agent, pipeline, tools) -> Dict[str, Callable[[int], Any]]:
+    skill_level = {'current': 'None', 'target': 'Intermediate'}
+
+    def endpoint(method: str, path: str, body_fn=None, ok=(200,)):
+        def call(i):
+            client = app_module.app.test_client()
+            response = client.open(path, method=method, json=body_fn(i) if body_fn else None)
+            if response.status_code not in ok:
+                raise RuntimeError(f"{method} {path} returned {response.status_code}")
+        return call
+
+    return {
+        'tools.search_wikipedia': lambda i: tools.search_wikipedia(f"Piano topic {i}", 3),
+        'tools.search_web': lambda i: tools.search_web(f"piano basics {i}", 5),
+        'tools.search_youtube': lambda i: tools.search_youtube(f"piano basics {i}", 3),
+        'tools.generate_timeline': lambda i: tools.generate_timeline(skill_level, 'Moderate'),
+        'tools.format_learning_plan': lambda i: tools.format_learning_plan(
+            'goal', 'piano', tools.generate_timeline(skill_level, 'Moderate'), []
+        ),
+        'agent.generate_steps': lambda i: agent.generate_steps(f"goal {i}", 'piano', skill_level, 'Moderate'),
+        'pipeline.generate_steps_pipeline': lambda i: pipeline.generate_steps_pipeline(
+            f"goal {i}", 'piano', skill_level, 'Moderate'
+        ),
+        'GET /api/health': endpoint('GET', '/api/health'),
+        'POST /api/goal-planner/validate-inputs': endpoint(
+            'POST', '/api/goal-planner/validate-inputs',
+            lambda i: {'goal': 'g', 'skill': 'piano', 'currentLevel': 'None',
+                       'targetLevel': 'Advanced', 'commitment': 'Moderate'}
+        ),
+        'GET /api/serp/search': endpoint('GET', f"/api/serp/search?query=piano"),
+        'POST /api/goal-planner/create-plan (agent)': endpoint(
+            'POST', '/api/goal-planner/create-plan', lambda i: plan_body(i, 'agent')
+        ),
+        'POST /api/goal-planner/create-plan (pipeline)': endpoint(
+            'POST', '/api/goal-planner/create-plan', lambda i: plan_body(i, 'pipeline')
+        )
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark for plan generation, tools and endpoints')
+    parser.add_argument('--concurrency', default='1,4,16', help='Comma-separated concurrency levels')
+    parser.add_argument('--iterations', type=int, default=32, help='Calls per scenario and concurrency level')
+    parser.add_argument('--upstream-latency', type=float, default=0.05, help='Fake SerpAPI/YouTube/MediaWiki latency (s)')
+    parser.add_argument('--upstream-error-rate', type=float, default=0.0, help='Fraction of upstream calls that fail')
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='Scripted LLM latency per call (s)')
+    parser.add_argument('--llm-error-rate', type=float, default=0.0, help='Fraction of LLM calls that fail')
+    parser.add_argument('--scenario', action='append', help='Only run scenarios containing this text (repeatable)')
+    parser.add_argument('--tool-cache', default='none', help='TOOL_CACHE_BACKEND to benchmark with')
+    parser.add_argument('--degrade', action='store_true', help='Let create-plan fall back to the fast path under load')
+    parser.add_argument('--output', default=None, help='Where to write the JSON results')
+    args = parser.parse_args()
+
+    upstream = FakeUpstreamServer(latency=args.upstream_latency, error_rate=args.upstream_error_rate).start()
+
+    # Configuration is read at import time, so point it at the fakes first
+    workdir = tempfile.mkdtemp(prefix='skill-roadmap-bench-')
+    os.environ.update(upstream.env())
+    os.environ['CACHE_DB_PATH'] = os.path.join(workdir, 'cache.sqlite3')
+    os.environ['PLAN_STORE_PATH'] = os.path.join(workdir, 'plans.sqlite3')
+    os.environ['TOOL_CACHE_BACKEND'] = args.tool_cache
+    os.environ['HTTP_RETRIES'] = '0'
+    # The scripted LLM stands in for Gemini, so a key is never used but must be set
+    # for create-plan to take the LLM path
+    os.environ['GOOGLE_GENAI_API_KEY'] = 'benchmark'
+    os.environ['DEGRADE_ENABLED'] = str(args.degrade)
+    # The fake SerpAPI is free; the gateway's budget and rate limit would only measure themselves
+    os.environ['SERP_DAILY_QUOTA'] = str(10 ** 9)
+    os.environ['SERP_RATE_PER_SECOND'] = str(10 ** 6)
+    os.environ['SERP_RATE_BURST'] = str(10 ** 6)
+
+    import_seconds = measure_import_seconds()
+    print(f"Cold import seconds: {import_seconds}")
+    import app as app_module
+    import agent
+    import pipeline
+    import tools
+
+    llm = ScriptedLLM(latency=args.llm_latency, error_rate=args.llm_error_rate)
+    agent._llms[False] = llm
+    agent._llms[True] = llm
+    # Like the server at startup, so the first measured plan doesn't pay for loading llama_index
+    agent.warm_up()
+
+    scenarios = build_scenarios(app_module, agent, pipeline, tools)
+    if args.scenario:
+        scenarios = {k: v for k, v in scenarios.items() if any(s in k for s in args.scenario)}
+
+    results = []
+    try:
+        for concurrency in [int(c) for c in args.concurrency.split(',')]:
+            for name, fn in scenarios.items():
+                results.append(run_scenario(name, fn, concurrency, args.iterations))
+    finally:
+        upstream.stop()
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'settings': vars(args),
+        'import_seconds': import_seconds,
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+        'upstream_requests': upstream.requests,
+        'llm_calls': llm.calls,
+        'results': results
+    }
+    output = args.output or f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from config import Config
+from models import LearningPlan
+
+
+class CacheStats:
+    """Thread-safe hit/miss/eviction counters for a cache"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def record(self, hits: int = 0, misses: int = 0, evictions: int = 0):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.evictions += evictions
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class MemoryCache:
+    """
+    In-process LRU cache with a per-entry TTL
+
+    Args:
+        max_size: Maximum number of entries kept before the least recently used is evicted
+        ttl: Seconds an entry stays valid
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.record(misses=1)
+                return default
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._data[key]
+                self.stats.record(misses=1, evictions=1)
+                return default
+            self._data.move_to_end(key)
+            self.stats.record(hits=1)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            evicted = 0
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                evicted += 1
+            if evicted:
+                self.stats.record(evictions=evicted)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """
+    SQLite-backed TTL cache that survives restarts and is shared between worker processes
+
+    Values are stored as JSON (or through the given codec). Each thread (and each forked process) opens its own
+    connection, and the database runs in WAL mode so readers never block the writer.
+
+    Args:
+        path: Database file path
+        table: Table name, so several caches can share one file
+        ttl: Seconds an entry stays valid
+        max_entries: Upper bound on stored rows; the oldest rows are pruned beyond it
+        dumps: Serializes a value to text
+        loads: Restores a value from its text
+    """
+
+    def __init__(self, path: str, table: str = 'cache', ttl: float = 86400, max_entries: int = 10000,
+                 dumps: Callable[[Any], str] = json.dumps, loads: Callable[[str], Any] = json.loads):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.dumps = dumps
+        self.loads = loads
+        self.stats = CacheStats()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and getattr(self._local, 'pid', None) == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+            'expires_at REAL NOT NULL, created_at REAL NOT NULL)'
+        )
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.table}_expires ON {self.table} (expires_at)')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            row = self._connect().execute(
+                f'SELECT value, expires_at FROM {self.table} WHERE key = ?', (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Cache read error: {str(e)}")
+            self.stats.record(misses=1)
+            return default
+
+        if row is None:
+            self.stats.record(misses=1)
+            return default
+        value, expires_at = row
+        if expires_at < time.time():
+            self.delete(key)
+            self.stats.record(misses=1, evictions=1)
+            return default
+        try:
+            loaded = self.loads(value)
+        except Exception as e:
+            # A corrupt row, or one written by an older codec, is dropped instead of
+            # failing every lookup of the key until it expires
+            print(f"Cache decode error: {str(e)}")
+            self.delete(key)
+            self.stats.record(misses=1, evictions=1)
+            return default
+        self.stats.record(hits=1)
+        return loaded
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        try:
+            conn = self._connect()
+            conn.execute(
+                f'INSERT OR REPLACE INTO {self.table} (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)',
+                (key, self.dumps(value), expires_at, now)
+            )
+            # Pruning is a table scan, so only do it every so often
+            with self._lock:
+                self._writes += 1
+                prune = self._writes % 100 == 0
+            if prune:
+                self.prune()
+        except sqlite3.Error as e:
+            print(f"Cache write error: {str(e)}")
+
+    def prune(self):
+        """Drop expired rows and trim the table down to max_entries"""
+        conn = self._connect()
+        removed = conn.execute(f'DELETE FROM {self.table} WHERE expires_at < ?', (time.time(),)).rowcount
+        removed += conn.execute(
+            f'DELETE FROM {self.table} WHERE key IN ('
+            f'SELECT key FROM {self.table} ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        ).rowcount
+        if removed:
+            self.stats.record(evictions=removed)
+
+    def delete(self, key: str):
+        try:
+            self._connect().execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+        except sqlite3.Error as e:
+            print(f"Cache delete error: {str(e)}")
+
+    def clear(self):
+        self._connect().execute(f'DELETE FROM {self.table}')
+
+
+class TieredCache:
+    """
+    Two-level cache: a fast in-process LRU in front of a shared SQLite store
+
+    Hits in the SQLite tier are promoted into memory so repeat lookups in the same
+    worker never touch the disk.
+    """
+
+    def __init__(self, memory: MemoryCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.stats = CacheStats()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        if value is None:
+            self.stats.record(misses=1)
+            return default
+        self.stats.record(hits=1)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.memory.set(key, value, ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, ttl)
+
+    def delete(self, key: str):
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters for the cache as a whole and for each tier"""
+        tiers = {'memory': self.memory.stats.snapshot()}
+        tiers['memory']['size'] = len(self.memory)
+        if self.disk is not None:
+            tiers['sqlite'] = self.disk.stats.snapshot()
+        return {**self.stats.snapshot(), 'tiers': tiers}
+
+
+def make_key(*parts: Any) -> str:
+    """
+    Build a stable cache key from JSON-serializable parts
+
+    Strings are stripped, lower-cased and have their whitespace collapsed so that
+    trivially different inputs share an entry.
+    """
+    def normalize(value):
+        if isinstance(value, str):
+            return ' '.join(value.lower().split())
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        return value
+
+    raw = json.dumps([normalize(p) for p in parts], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def plan_cache_key(formatted_input: Dict[str, Any], engine: str = 'agent') -> str:
+    """Cache key for the inputs create_learning_plan passes to a plan engine"""
+    return make_key('plan', engine, formatted_input)
+
+
+plan_cache = TieredCache(
+    MemoryCache(max_size=Config.PLAN_CACHE_SIZE, ttl=Config.PLAN_CACHE_TTL),
+    SQLiteCache(Config.CACHE_DB_PATH, table='plan_cache', ttl=Config.PLAN_CACHE_TTL,
+                dumps=LearningPlan.to_json, loads=LearningPlan.from_json)
+    if Config.CACHE_DB_PATH else None
+)
@@ -4,12 +4,37 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+def _parse_host_limits(value):
+    """Parse 'host=limit,host=limit' into a dict"""
+    limits = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            host, limit = item.split('=', 1)
+            limits[host.strip()] = int(limit)
+    return limits
+
 class Config:
     """Configuration for the application"""
     # Flask configuration
     DEBUG = os.getenv('DEBUG', 'True').lower() in ('true', '1', 't')
     PORT = int(os.getenv('REACT_APP_PORT', 5000))
     
+    # Production server (gunicorn -c gunicorn.conf.py wsgi:app)
+    # Worker processes; 0 sizes them from the CPU count, up to WEB_MAX_WORKERS
+    WEB_WORKERS = int(os.getenv('WEB_WORKERS', 0))
+    WEB_MAX_WORKERS = int(os.getenv('WEB_MAX_WORKERS', 8))
+    # Request threads per worker; plan requests mostly wait on the LLM and upstreams
+    WEB_THREADS = int(os.getenv('WEB_THREADS', 32))
+    # Request threads that heavy-lane work can never take, left for health checks
+    # and light requests (see lanes.check_request_threads)
+    WEB_RESERVED_THREADS = int(os.getenv('WEB_RESERVED_THREADS', 8))
+    WEB_TIMEOUT = int(os.getenv('WEB_TIMEOUT', 180))
+    # Seconds a thread waits for a coroutine on the shared event loop (e.g. a tool
+    # call) before the coroutine is cancelled; plan generations use PLAN_TIMEOUT
+    RUN_SYNC_TIMEOUT = float(os.getenv('RUN_SYNC_TIMEOUT', 150))
+    # Seconds a stopping worker has to finish in-flight plan generations
+    GRACEFUL_TIMEOUT = int(os.getenv('GRACEFUL_TIMEOUT', 120))
+    
     # API keys
     SERP_API_KEY = os.getenv('SERP_API_KEY')
     YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY')
@@ -19,6 +44,31 @@ class Config:
     LLM_MODEL = 'gemini-1.5-pro'
     LLM_TEMPERATURE = 0.2
     
+    # Plan engine: 'agent' (free-form ReAct loop), 'pipeline' (fixed, low-iteration)
+    # or 'fast' (templates and cached resources, no LLM)
+    PLAN_ENGINE = os.getenv('PLAN_ENGINE', 'agent')
+    # Idle agents kept per worker for reuse between requests
+    AGENT_POOL_SIZE = int(os.getenv('AGENT_POOL_SIZE', 4))
+    # Load llama_index and build the agent in a background thread at startup;
+    # otherwise that happens on the first plan request
+    WARM_UP = os.getenv('WARM_UP', 'True').lower() in ('true', '1', 't')
+    
+    # Outbound HTTP (pooled async client used by every tool and proxy endpoint)
+    HTTP_USER_AGENT = 'skill-roadmap-app/1.0 (contact@example.com)'
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 10))
+    HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 32))
+    HTTP_MAX_IN_FLIGHT = int(os.getenv('HTTP_MAX_IN_FLIGHT', 16))
+    HTTP_MAX_IN_FLIGHT_PER_HOST = _parse_host_limits(os.getenv('HTTP_MAX_IN_FLIGHT_PER_HOST', 'serpapi.com=8'))
+    # Seconds to wait for a free in-flight slot before giving up on an upstream
+    HTTP_QUEUE_TIMEOUT = float(os.getenv('HTTP_QUEUE_TIMEOUT', 5))
+    
+    # Upstream endpoints
+    SERP_API_URL = os.getenv('SERP_API_URL', 'https://serpapi.com/search.json')
+    YOUTUBE_API_URL = os.getenv('YOUTUBE_API_URL', 'https://www.googleapis.com/youtube/v3/search')
+    WIKIPEDIA_API_URL = os.getenv('WIKIPEDIA_API_URL', 'https://en.wikipedia.org/w/api.php')
+    
     # Validation
     VALID_SKILL_LEVELS = ['None', 'Beginner', 'Intermediate', 'Advanced', 'Expert']
     VALID_COMMITMENT_LEVELS = ['No rush', 'Moderate', 'Dedicated', 'Intensive']
@@ -27,6 +77,102 @@ class Config:
     MIN_STEPS = 5
     MAX_STEPS = 50
     
+    # Plan cache (in-memory LRU in front of a shared SQLite store)
+    CACHE_DB_PATH = os.getenv('CACHE_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache.sqlite3'))
+    PLAN_CACHE_SIZE = int(os.getenv('PLAN_CACHE_SIZE', 256))
+    PLAN_CACHE_TTL = int(os.getenv('PLAN_CACHE_TTL', 7 * 24 * 3600))
+    
+    # Generated plans, kept so they can be fetched again without regenerating them
+    PLAN_STORE_PATH = os.getenv('PLAN_STORE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'plans.sqlite3'))
+    PLAN_LIST_MAX = int(os.getenv('PLAN_LIST_MAX', 100))
+    # Stored plans are dropped after this many seconds, and the oldest beyond PLAN_STORE_MAX_PLANS
+    PLAN_STORE_TTL = int(os.getenv('PLAN_STORE_TTL', 30 * 24 * 3600))
+    PLAN_STORE_MAX_PLANS = int(os.getenv('PLAN_STORE_MAX_PLANS', 10000))
+    
+    # Tool result cache: 'memory', 'sqlite', 'tiered' or 'none'
+    TOOL_CACHE_BACKEND = os.getenv('TOOL_CACHE_BACKEND', 'tiered')
+    TOOL_CACHE_SIZE = int(os.getenv('TOOL_CACHE_SIZE', 2048))
+    WIKIPEDIA_CACHE_TTL = int(os.getenv('WIKIPEDIA_CACHE_TTL', 7 * 24 * 3600))
+    WEB_CACHE_TTL = int(os.getenv('WEB_CACHE_TTL', 24 * 3600))
+    YOUTUBE_CACHE_TTL = int(os.getenv('YOUTUBE_CACHE_TTL', 24 * 3600))
+    # Empty results are cached too, but only briefly
+    TOOL_CACHE_NEGATIVE_TTL = int(os.getenv('TOOL_CACHE_NEGATIVE_TTL', 3600))
+    
+    # Wikipedia proxy endpoints: full pages are large, so fewer are kept in memory
+    WIKI_PAGE_CACHE_SIZE = int(os.getenv('WIKI_PAGE_CACHE_SIZE', 128))
+    WIKI_PAGE_CACHE_TTL = int(os.getenv('WIKI_PAGE_CACHE_TTL', 24 * 3600))
+    # Cache-Control max-age sent to clients
+    WIKI_HTTP_MAX_AGE = int(os.getenv('WIKI_HTTP_MAX_AGE', 3600))
+    WIKI_SEARCH_MAX_RESULTS = 20
+    
+    # SerpAPI gateway: every search goes through one rate limiter and a daily budget
+    SERP_DAILY_QUOTA = int(os.getenv('SERP_DAILY_QUOTA', 150))
+    # Token bucket, per worker process
+    SERP_RATE_PER_SECOND = float(os.getenv('SERP_RATE_PER_SECOND', 1))
+    SERP_RATE_BURST = int(os.getenv('SERP_RATE_BURST', 5))
+    # Seconds a search may wait for a rate-limiter token
+    SERP_RATE_WAIT = float(os.getenv('SERP_RATE_WAIT', 2))
+    # What web searches return once the budget is spent: 'wikipedia' (Wikipedia
+    # search results) or 'cached' (cached results only, otherwise nothing)
+    SERP_FALLBACK = os.getenv('SERP_FALLBACK', 'wikipedia')
+    
+    # Response compression (gzip or deflate, per Accept-Encoding); smaller bodies are sent as is
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+    
+    # Background plan jobs
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+    JOB_QUEUE_LIMIT = int(os.getenv('JOB_QUEUE_LIMIT', 32))
+    JOB_RESULT_TTL = int(os.getenv('JOB_RESULT_TTL', 3600))
+    
+    # Batch plan creation; a batch runs up to BATCH_WORKERS plans at once on the heavy
+    # lane, and no more than the client's ADMISSION_MAX_PER_CLIENT
+    BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', 8))
+    BATCH_MAX_PLANS = int(os.getenv('BATCH_MAX_PLANS', 500))
+    
+    # Resource research (run in parallel after the agent lays out the steps)
+    PARALLEL_RESEARCH = os.getenv('PARALLEL_RESEARCH', 'True').lower() in ('true', '1', 't')
+    RESEARCH_WORKERS = int(os.getenv('RESEARCH_WORKERS', 12))
+    RESEARCH_WIKIPEDIA_RESULTS = 1
+    RESEARCH_WEB_RESULTS = 2
+    RESEARCH_YOUTUBE_RESULTS = 1
+    
+    # Executor lanes: plan generations and lightweight requests get separate pools,
+    # each with its own queue limit, so one can't starve the other. Every heavy task
+    # has a request thread waiting on it, so heavy workers plus queue must fit in
+    # WEB_THREADS - WEB_RESERVED_THREADS
+    HEAVY_LANE_WORKERS = int(os.getenv('HEAVY_LANE_WORKERS', 12))
+    HEAVY_LANE_QUEUE = int(os.getenv('HEAVY_LANE_QUEUE', 12))
+    LIGHT_LANE_WORKERS = int(os.getenv('LIGHT_LANE_WORKERS', 16))
+    LIGHT_LANE_QUEUE = int(os.getenv('LIGHT_LANE_QUEUE', 64))
+    
+    # Admission control for LLM plan generations (create-plan, its stream, jobs and
+    # every plan of a batch), per worker process
+    ADMISSION_MAX_CONCURRENT = int(os.getenv('ADMISSION_MAX_CONCURRENT', 8))
+    ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', 16))
+    # Seconds a request may wait for a slot before it gets a 503
+    ADMISSION_MAX_WAIT = float(os.getenv('ADMISSION_MAX_WAIT', 30))
+    # Running plus waiting requests allowed per client address
+    ADMISSION_MAX_PER_CLIENT = int(os.getenv('ADMISSION_MAX_PER_CLIENT', 4))
+    # Seconds a whole plan generation may run before it is cancelled: what's left of
+    # a request's WEB_TIMEOUT after waiting for admission
+    PLAN_TIMEOUT = float(os.getenv('PLAN_TIMEOUT', max(WEB_TIMEOUT - ADMISSION_MAX_WAIT, 1)))
+    
+    # Degraded mode: plans are assembled from templates and cached resources in
+    # milliseconds when the LLM is unavailable or overloaded
+    DEGRADE_ENABLED = os.getenv('DEGRADE_ENABLED', 'True').lower() in ('true', '1', 't')
+    # Plan generations (running plus queued jobs) above which new requests are degraded
+    DEGRADE_MAX_IN_FLIGHT = int(os.getenv('DEGRADE_MAX_IN_FLIGHT', 16))
+    # Degrade while the p90 latency of recent LLM plans is above this many seconds
+    DEGRADE_LATENCY_SLO = float(os.getenv('DEGRADE_LATENCY_SLO', 90))
+    DEGRADE_LATENCY_WINDOW = int(os.getenv('DEGRADE_LATENCY_WINDOW', 300))
+    DEGRADE_MIN_SAMPLES = int(os.getenv('DEGRADE_MIN_SAMPLES', 5))
+    # The p90 is taken over at most this many of the most recent latencies
+    DEGRADE_MAX_SAMPLES = int(os.getenv('DEGRADE_MAX_SAMPLES', 20))
+    # Share of requests still sent to the LLM while degraded for latency, as probes
+    DEGRADE_PROBE_FRACTION = float(os.getenv('DEGRADE_PROBE_FRACTION', 0.1))
+    FAST_PATH_STEPS_PER_MILESTONE = int(os.getenv('FAST_PATH_STEPS_PER_MILESTONE', 3))
+    
     # Check required environment variables
     @classmethod
     def validate_config(cls):
@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from config import Config
+
+
+class DegradePolicy:
+    """
+    Decides when plan requests should get the fast-path engine instead of the LLM
+
+    Args:
+        max_in_flight: Plan generations (running plus queued) at which new requests are degraded
+        latency_slo: Seconds; requests are degraded while the p90 of recent LLM plan latencies is above it
+        window: Seconds a recorded latency counts towards the p90
+        min_samples: Latencies needed in the window before the SLO is enforced
+        max_samples: Only the most recent latencies count towards the p90
+        probe_fraction: Share of requests still sent to the LLM while degraded for
+            latency, so that fresh latencies keep coming in and the policy can
+            recover before the window runs out
+    """
+
+    def __init__(self, max_in_flight: int, latency_slo: float, window: float, min_samples: int,
+                 max_samples: int = 20, probe_fraction: float = 0.1):
+        self.max_in_flight = max_in_flight
+        self.latency_slo = latency_slo
+        self.window = window
+        self.min_samples = min_samples
+        self.probe_every = round(1 / probe_fraction) if probe_fraction > 0 else 0
+        self._samples = deque(maxlen=max(max_samples, min_samples, 1))
+        self._lock = threading.Lock()
+        self._latency_degraded = 0
+
+    def record(self, seconds: float):
+        """Record the latency of a plan generated by an LLM engine"""
+        with self._lock:
+            self._samples.append((time.monotonic(), seconds))
+            self._prune()
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.window
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+
+    def p90(self) -> Optional[float]:
+        """p90 of the latencies in the window, or None with too few samples"""
+        with self._lock:
+            self._prune()
+            values = sorted(seconds for _, seconds in self._samples)
+        if len(values) < max(self.min_samples, 1):
+            return None
+        return values[min(int(len(values) * 0.9), len(values) - 1)]
+
+    def reason(self, in_flight: int) -> Optional[str]:
+        """
+        Why a new plan request should be degraded right now, or None if it shouldn't
+
+        Returns:
+            'no_api_key', 'queue_depth' or 'latency'
+        """
+        if not Config.GOOGLE_GENAI_API_KEY:
+            return 'no_api_key'
+        if in_flight >= self.max_in_flight:
+            return 'queue_depth'
+        p90 = self.p90()
+        if p90 is not None and p90 > self.latency_slo:
+            with self._lock:
+                self._latency_degraded += 1
+                probe = self.probe_every and self._latency_degraded % self.probe_every == 0
+            return None if probe else 'latency'
+        return None
+
+
+degrade_policy = DegradePolicy(
+    max_in_flight=Config.DEGRADE_MAX_IN_FLIGHT,
+    latency_slo=Config.DEGRADE_LATENCY_SLO,
+    window=Config.DEGRADE_LATENCY_WINDOW,
+    min_samples=Config.DEGRADE_MIN_SAMPLES,
+    max_samples=Config.DEGRADE_MAX_SAMPLES,
+    probe_fraction=Config.DEGRADE_PROBE_FRACTION
+)
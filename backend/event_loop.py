@@ -0,0 +1,101 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import os
+import threading
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from config import Config
+
+T = TypeVar('T')
+
+_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_pid: Optional[int] = None
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the worker's shared event loop, starting its thread on first use
+
+    Async tool calls and plan generations started from synchronous code all run
+    on this one loop, so a worker can have hundreds of them waiting on I/O
+    without a thread for each. A forked worker starts its own loop.
+    """
+    global _loop, _loop_thread, _loop_pid
+    with _lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(target=_loop.run_forever, name='event-loop', daemon=True)
+            _loop_thread.start()
+            _loop_pid = os.getpid()
+        return _loop
+
+
+def run_sync(awaitable: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """
+    Run a coroutine on the shared event loop and block until it finishes
+
+    The coroutine sees the caller's context variables.
+
+    Args:
+        awaitable: Coroutine to run
+        timeout: Seconds to wait (defaults to Config.RUN_SYNC_TIMEOUT), after
+            which the coroutine is cancelled
+
+    Raises:
+        TimeoutError: If the coroutine didn't finish in time
+        RuntimeError: If called from a coroutine running on the shared loop,
+            which would wait on itself forever
+    """
+    loop = get_loop()
+    if threading.current_thread() is _loop_thread:
+        raise RuntimeError("run_sync called from the shared event loop; await the coroutine instead")
+
+    context = contextvars.copy_context()
+    result = concurrent.futures.Future()
+    tasks = []
+
+    def start():
+        task = context.run(loop.create_task, awaitable)
+        tasks.append(task)
+
+        def done(task: asyncio.Task):
+            if task.cancelled():
+                result.cancel()
+            elif task.exception() is not None:
+                result.set_exception(task.exception())
+            else:
+                result.set_result(task.result())
+
+        task.add_done_callback(done)
+
+    if timeout is None:
+        timeout = Config.RUN_SYNC_TIMEOUT
+    loop.call_soon_threadsafe(start)
+    try:
+        return result.result(timeout)
+    except concurrent.futures.TimeoutError:
+        # Runs after start, which was scheduled first
+        loop.call_soon_threadsafe(lambda: [task.cancel() for task in tasks])
+        raise TimeoutError(f"Coroutine didn't finish within {timeout}s") from None
+
+
+def synchronous(async_fn: Callable[..., Awaitable[T]]) -> Callable[..., T]:
+    """
+    Blocking version of a coroutine function that runs it on the shared event loop
+
+    The wrapper keeps the coroutine function's signature, docstring and attributes
+    (e.g. a cached tool's lookup), and its name without the "_async" suffix.
+    """
+    @functools.wraps(async_fn)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        return run_sync(async_fn(*args, **kwargs))
+
+    name = async_fn.__name__
+    if name.endswith('_async'):
+        wrapper.__name__ = name[:-len('_async')]
+        wrapper.__qualname__ = async_fn.__qualname__[:-len('_async')]
+    return wrapper
@@ -0,0 +1,101 @@
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import quote_plus
+
+from agent import PlanEventStream
+from config import Config
+from models import LearningPlan, Resource
+from research import attach_cached_resources, step_query
+from tools import format_learning_plan, generate_timeline, step_templates
+
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+
+# Search pages linked from steps with nothing in the tool caches; building them
+# needs no upstream call
+SEARCH_LINKS = [
+    ('article', 'Wikipedia search: {query}', 'https://en.wikipedia.org/w/index.php?search={q}'),
+    ('video', 'YouTube videos: {query}', 'https://www.youtube.com/results?search_query={q}')
+]
+
+
+def generate_steps_fast(
+    goal: str,
+    skill: str,
+    skill_level: Dict[str, str],
+    commitment_level: str,
+    on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> LearningPlan:
+    """
+    Assemble a learning plan in milliseconds, without the LLM or any upstream call
+
+    The timeline comes from generate_timeline, every milestone gets steps from the
+    curated step templates, and resources are whatever the tool caches already hold
+    for those steps; steps with nothing cached (e.g. on a cold cache) get search
+    links for their query instead of no resources at all. Used as the degraded
+    engine when the LLM is unavailable or overloaded. Takes the same arguments and
+    returns the same shape as agent.generate_steps.
+    """
+    stream = PlanEventStream(on_event) if on_event else None
+
+    timeline = generate_timeline(skill_level=skill_level, commitment_level=commitment_level)
+    steps = template_steps(skill, timeline)
+    plan = LearningPlan.from_dict(format_learning_plan(goal=goal, skill=skill, timeline=timeline, steps=steps))
+    attach_cached_resources(plan.steps, skill)
+    for step in plan.steps:
+        if not step.resources:
+            step.resources = search_links(step_query(step, skill))
+
+    if stream is not None:
+        stream.finish(plan)
+    return plan
+
+
+def template_steps(skill: str, timeline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Lay out template steps over every milestone of a timeline
+
+    Each milestone gets Config.FAST_PATH_STEPS_PER_MILESTONE steps, continuing
+    through the templates in order; templates reused by a later milestone are
+    tagged with that milestone's name so titles stay distinct.
+    """
+    templates = step_templates(skill)
+    milestones = timeline.get('milestones') or [{'id': 'milestone-1', 'name': '', 'duration_weeks': 1}]
+    per_milestone = max(Config.FAST_PATH_STEPS_PER_MILESTONE, -(-Config.MIN_STEPS // len(milestones)))
+
+    steps = []
+    for m, milestone in enumerate(milestones):
+        difficulty = DIFFICULTIES[min(m * len(DIFFICULTIES) // len(milestones), len(DIFFICULTIES) - 1)]
+        weeks = max(round(milestone.get('duration_weeks', 1) / per_milestone), 1)
+        for _ in range(per_milestone):
+            if len(steps) >= Config.MAX_STEPS:
+                return steps
+            i = len(steps)
+            template = templates[i % len(templates)]
+            title = template['title']
+            if i >= len(templates) and milestone.get('name'):
+                title = f"{title} ({milestone['name']})"
+            steps.append({
+                'id': f"step-{i + 1}",
+                'title': title,
+                'description': template['description'],
+                'time_estimate': f"{weeks} week{'s' if weeks > 1 else ''}",
+                'difficulty': difficulty,
+                'resources': [],
+                'expected_outcome': template['expected_outcome'],
+                'milestone_id': milestone['id']
+            })
+    return steps
+
+
+def search_links(query: str) -> List[Resource]:
+    """
+    Link a query's Wikipedia and YouTube search pages as step resources
+    """
+    return [
+        Resource(
+            title=title.format(query=query),
+            url=url.format(q=quote_plus(query)),
+            type=resource_type,
+            description=f"Search results for \"{query}\""
+        )
+        for resource_type, title, url in SEARCH_LINKS
+    ]
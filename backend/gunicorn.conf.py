@@ -0,0 +1,63 @@
+"""
+Gunicorn settings for the backend: gunicorn -c gunicorn.conf.py wsgi:app
+
+Sizes are read from Config (WEB_* and GRACEFUL_TIMEOUT environment variables).
+"""
+import multiprocessing
+import os
+import signal
+import time
+
+from config import Config
+from lanes import check_request_threads
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('REACT_APP_PORT', 5050)}")
+
+# Threads in every worker: plan requests spend their time waiting on the LLM and
+# upstream APIs, and the executor lanes bound the actual work
+worker_class = 'gthread'
+workers = Config.WEB_WORKERS or min(multiprocessing.cpu_count() * 2 + 1, Config.WEB_MAX_WORKERS)
+threads = Config.WEB_THREADS
+
+# Fail at startup rather than let plan requests take every request thread
+check_request_threads(threads, Config.WEB_RESERVED_THREADS)
+
+# Import the app (and llama_index) once in the master, before forking
+preload_app = True
+
+timeout = Config.WEB_TIMEOUT
+graceful_timeout = Config.GRACEFUL_TIMEOUT
+keepalive = 5
+accesslog = '-'
+
+_term_received = None
+
+
+def post_fork(server, worker):
+    # Threads don't survive a fork, so every worker warms up its own agent
+    import app
+    if Config.WARM_UP:
+        app.agent_warm_up.start()
+
+
+def post_worker_init(worker):
+    # Gunicorn's own SIGTERM handler only stops accepting connections; fail
+    # readiness and refuse new plans straight away as well
+    import app
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_term(signum, frame):
+        global _term_received
+        _term_received = time.monotonic()
+        app.draining.set()
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_term)
+
+
+def worker_exit(server, worker):
+    # Requests are finished by now; background jobs and streamed plans may not be
+    import app
+    elapsed = time.monotonic() - _term_received if _term_received else 0
+    app.drain(max(Config.GRACEFUL_TIMEOUT - elapsed, 0))
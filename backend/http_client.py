@@ -0,0 +1,71 @@
+import asyncio
+import weakref
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from config import Config
+
+
+class UpstreamBusyError(httpx.TransportError):
+    """Raised when an upstream already has its maximum number of requests in flight"""
+
+
+class AsyncPooledClient:
+    """
+    Shared outbound HTTP client for the coroutines on one event loop
+
+    Connections are pooled and kept alive, every request gets connect and read
+    timeouts, GETs are retried on connection errors and 502/503/504, and the
+    number of concurrent requests to any single host is capped so a slow upstream
+    can't absorb every connection. Waiting for a free slot or a response doesn't
+    hold a thread, only a coroutine.
+    """
+
+    RETRY_STATUSES = (502, 503, 504)
+
+    def __init__(self):
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(Config.HTTP_READ_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=Config.HTTP_POOL_MAXSIZE, max_keepalive_connections=Config.HTTP_POOL_MAXSIZE),
+            transport=httpx.AsyncHTTPTransport(retries=Config.HTTP_RETRIES),
+            headers={'User-Agent': Config.HTTP_USER_AGENT}
+        )
+        self._limiters: Dict[str, asyncio.Semaphore] = {}
+
+    def _limiter(self, host: str) -> asyncio.Semaphore:
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            limit = Config.HTTP_MAX_IN_FLIGHT_PER_HOST.get(host, Config.HTTP_MAX_IN_FLIGHT)
+            limiter = self._limiters[host] = asyncio.Semaphore(limit)
+        return limiter
+
+    async def get(self, url: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        host = urlsplit(url).hostname or ''
+        limiter = self._limiter(host)
+        try:
+            await asyncio.wait_for(limiter.acquire(), Config.HTTP_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise UpstreamBusyError(f"Too many requests in flight to {host}") from None
+        try:
+            for attempt in range(Config.HTTP_RETRIES + 1):
+                response = await self._client.get(url, params=params)
+                if response.status_code not in self.RETRY_STATUSES or attempt == Config.HTTP_RETRIES:
+                    return response
+                await asyncio.sleep(0.3 * 2 ** attempt)
+        finally:
+            limiter.release()
+
+
+# One client per event loop, since httpx connections belong to the loop that opened them
+_async_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncPooledClient]' = weakref.WeakKeyDictionary()
+
+
+def async_session() -> AsyncPooledClient:
+    """Return the pooled async client of the running event loop, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncPooledClient()
+    return client
@@ -0,0 +1,170 @@
+import functools
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from flask import copy_current_request_context, jsonify
+
+from config import Config
+import metrics
+
+
+class LaneFull(Exception):
+    """Raised when a lane already has as many tasks waiting as its queue allows"""
+
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"Server is busy ({lane} lane full)")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class Lane:
+    """
+    Worker pool with its own size and queue limit for one class of work
+
+    Slow plan generations and quick lookups run in different lanes, so a backlog
+    of one can never take the threads the other needs. Submitting to a lane whose
+    workers are busy and whose queue is full fails at once with LaneFull instead
+    of waiting.
+
+    Args:
+        name: Lane name, used in thread names, errors and metrics
+        workers: Tasks run at once
+        max_queue: Tasks allowed to wait for a worker
+    """
+
+    def __init__(self, name: str, workers: int, max_queue: int):
+        self.name = name
+        self.workers = max(workers, 1)
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f'lane-{name}')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._active = 0
+        # Moving average of task duration, for Retry-After
+        self._task_seconds = None
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Run fn(*args, **kwargs) on the lane
+
+        Raises:
+            LaneFull: If the lane can't take another task
+        """
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                metrics.lane_rejections.inc(lane=self.name)
+                raise LaneFull(self.name, self._retry_after())
+            self._pending += 1
+        try:
+            return self._executor.submit(self._run, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    def _run(self, fn: Callable[..., Any], args, kwargs) -> Any:
+        with self._lock:
+            self._active += 1
+        start = time.monotonic()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self._active -= 1
+                self._pending -= 1
+                self._task_seconds = elapsed if self._task_seconds is None else 0.8 * self._task_seconds + 0.2 * elapsed
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil((self._task_seconds or 1) * self.max_queue / self.workers))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            queued = self._pending - self._active
+            return {
+                'workers': self.workers,
+                'active': self._active,
+                'queued': queued,
+                'max_queue': self.max_queue,
+                'saturation': round(self._pending / (self.workers + self.max_queue), 3),
+                'full': self._pending >= self.workers + self.max_queue
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+# Plan generations (create-plan and its stream) go to the heavy lane; proxies,
+# validation and lookups to the light lane. Health checks run on the request
+# thread and never wait for either.
+lanes = {
+    'heavy': Lane('heavy', Config.HEAVY_LANE_WORKERS, Config.HEAVY_LANE_QUEUE),
+    'light': Lane('light', Config.LIGHT_LANE_WORKERS, Config.LIGHT_LANE_QUEUE)
+}
+
+
+def check_request_threads(threads: int, reserved: int):
+    """
+    Make sure heavy-lane work can't hold every request thread of a worker
+
+    Every heavy task, running or queued, has a request thread waiting on it
+    (create-plan and its stream one each, a batch one for several tasks), so the
+    heavy lane's workers plus queue must leave `reserved` threads free; otherwise
+    a burst of plan requests takes every thread before LaneFull is raised, and
+    health checks and light requests wait behind it.
+
+    Raises:
+        ValueError: If the heavy lane can take more tasks than that
+    """
+    heavy = lanes['heavy']
+    if heavy.workers + heavy.max_queue > threads - reserved:
+        raise ValueError(
+            f"HEAVY_LANE_WORKERS + HEAVY_LANE_QUEUE ({heavy.workers} + {heavy.max_queue}) must be at most "
+            f"WEB_THREADS - WEB_RESERVED_THREADS ({threads} - {reserved})"
+        )
+
+
+def lane_full_response(error: LaneFull):
+    response = jsonify({"error": str(error), "lane": error.lane, "retry_after": error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
+
+def in_lane(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Run a Flask view on the named lane, answering 503 with Retry-After when the lane is full
+
+    The request thread waits for the view's result; the view itself runs on a
+    lane worker with a copy of the request context.
+    """
+    lane = lanes[name]
+
+    def decorator(view: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                future = lane.submit(copy_current_request_context(view), *args, **kwargs)
+            except LaneFull as e:
+                return lane_full_response(e)
+            return future.result()
+        return wrapper
+
+    return decorator
+
+
+def lane_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: lane.stats() for name, lane in lanes.items()}
+
+
+metrics.registry.register(metrics.Gauge(
+    'lane_tasks', 'Tasks running and waiting in each executor lane',
+    lambda: {
+        (name, state): stats[state]
+        for name, stats in lane_stats().items()
+        for state in ('active', 'queued')
+    },
+    ['lane', 'state']
+))
@@ -0,0 +1,188 @@
+import re
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from event_loop import synchronous
+from http_client import async_session
+
+SUMMARY_PARAMS = {
+    'prop': 'extracts|info',
+    'exintro': 1,
+    'explaintext': 1,
+    'exlimit': 'max',
+    'inprop': 'url',
+    'redirects': 1
+}
+
+
+async def api_query_async(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run a MediaWiki action=query request against the configured wiki
+
+    Args:
+        params: Query parameters on top of action/format
+
+    Returns:
+        The 'query' part of the response (empty if there is none)
+    """
+    response = await async_session().get(Config.WIKIPEDIA_API_URL, params={
+        'action': 'query',
+        'format': 'json',
+        'formatversion': 2,
+        **params
+    })
+    response.raise_for_status()
+    return response.json().get('query', {})
+
+
+def _page_summary(page: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    if page.get('missing') or page.get('invalid'):
+        return None
+    return {
+        'title': page['title'],
+        'summary': page.get('extract', ''),
+        'url': page.get('fullurl', '')
+    }
+
+
+async def fetch_summaries_async(titles: List[str]) -> Dict[str, Dict[str, str]]:
+    """
+    Fetch the intro summaries of several pages in one batched request
+
+    Args:
+        titles: Page titles (at most 20, the extracts limit for one request)
+
+    Returns:
+        Dict mapping each requested title that exists to its title, summary and URL
+    """
+    if not titles:
+        return {}
+    query = await api_query_async({'titles': '|'.join(titles), **SUMMARY_PARAMS})
+
+    # Follow title normalization and redirects back to what was asked for
+    resolved = {title: title for title in titles}
+    for mapping in query.get('normalized', []) + query.get('redirects', []):
+        for requested, current in resolved.items():
+            if current == mapping['from']:
+                resolved[requested] = mapping['to']
+
+    pages = {}
+    for page in query.get('pages', []):
+        summary = _page_summary(page)
+        if summary is not None:
+            pages[page['title']] = summary
+
+    return {requested: pages[title] for requested, title in resolved.items() if title in pages}
+
+
+async def fetch_link_summaries_async(title: str, limit: int) -> List[Dict[str, str]]:
+    """
+    Fetch the summaries of the first few articles a page links to, in one request
+
+    Only `limit` link titles are requested instead of the page's full link list.
+
+    Args:
+        title: Page whose links to follow
+        limit: Maximum number of linked pages
+
+    Returns:
+        List of title, summary and URL dictionaries, ordered by title
+    """
+    if limit <= 0:
+        return []
+    query = await api_query_async({
+        'titles': title,
+        'generator': 'links',
+        'gplnamespace': 0,
+        'gpllimit': limit,
+        **SUMMARY_PARAMS
+    })
+    summaries = [_page_summary(page) for page in query.get('pages', [])]
+    return sorted((s for s in summaries if s is not None), key=lambda s: s['title'])[:limit]
+
+
+async def search_async(query: str, limit: int) -> List[Dict[str, str]]:
+    """
+    Full-text search, returning the intro summary of every hit in the same request
+
+    Args:
+        query: Search terms
+        limit: Maximum number of results (at most 20, the extracts limit)
+
+    Returns:
+        List of title, summary and URL dictionaries in search ranking order
+    """
+    if limit <= 0:
+        return []
+    query_result = await api_query_async({
+        'generator': 'search',
+        'gsrsearch': query,
+        'gsrnamespace': 0,
+        'gsrlimit': limit,
+        **SUMMARY_PARAMS
+    })
+    pages = sorted(query_result.get('pages', []), key=lambda page: page.get('index', 0))
+    summaries = [_page_summary(page) for page in pages]
+    return [s for s in summaries if s is not None][:limit]
+
+
+# "== Heading ==" lines in plain-text extracts fetched with exsectionformat=wiki
+_HEADING = re.compile(r'^(={2,6})\s*(.+?)\s*\1\s*$', re.MULTILINE)
+
+
+def split_sections(text: str) -> List[Dict[str, Any]]:
+    """
+    Split a plain-text article into its intro (index 0) and headed sections
+
+    Returns:
+        List of dicts with index, title, level (1 for the intro and top-level
+        sections) and text
+    """
+    sections = []
+    position = 0
+    title, level = '', 1
+    for match in _HEADING.finditer(text):
+        sections.append({'index': len(sections), 'title': title, 'level': level,
+                         'text': text[position:match.start()].strip()})
+        title, level = match.group(2), len(match.group(1)) - 1
+        position = match.end()
+    sections.append({'index': len(sections), 'title': title, 'level': level, 'text': text[position:].strip()})
+    return sections
+
+
+async def fetch_page_async(title: str) -> Optional[Dict[str, Any]]:
+    """
+    Fetch the full plain text of a page, split into sections
+
+    Args:
+        title: Page title; redirects are followed
+
+    Returns:
+        Dict with title, url, revision (the latest revision id) and sections, or
+        None if the page doesn't exist
+    """
+    query = await api_query_async({
+        'titles': title,
+        'prop': 'extracts|info',
+        'explaintext': 1,
+        'exsectionformat': 'wiki',
+        'inprop': 'url',
+        'redirects': 1
+    })
+    pages = query.get('pages', [])
+    if not pages or pages[0].get('missing') or pages[0].get('invalid'):
+        return None
+    page = pages[0]
+    return {
+        'title': page['title'],
+        'url': page.get('fullurl', ''),
+        'revision': page.get('lastrevid'),
+        'sections': split_sections(page.get('extract', ''))
+    }
+
+
+# Blocking versions, for callers that aren't coroutines
+fetch_summaries = synchronous(fetch_summaries_async)
+search = synchronous(search_async)
+fetch_page = synchronous(fetch_page_async)
+
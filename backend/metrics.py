@@ -0,0 +1,254 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from fast local calls up to full agent runs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class Metric:
+    """Base class for metrics rendered in the Prometheus text format"""
+
+    type = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        return '\n'.join(lines + self.samples())
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in sorted(values.items())]
+
+
+class Gauge(Metric):
+    """Gauge whose values are read from a callback at scrape time"""
+
+    type = 'gauge'
+
+    def __init__(self, name: str, help: str, fn: Callable[[], Dict[Tuple[str, ...], float]],
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.fn = fn
+
+    def samples(self) -> List[str]:
+        try:
+            values = self.fn()
+        except Exception as e:
+            print(f"Error collecting {self.name}: {str(e)}")
+            return []
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in sorted(values.items())]
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._counts = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = {k: (list(c), s) for k, (c, s) in self._values.items()}
+            counts = dict(self._counts)
+        lines = []
+        for key, (bucket_counts, total) in sorted(values.items()):
+            for bound, count in zip(self.buckets, bucket_counts):
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {counts[key]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {counts[key]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return '\n'.join(metric.render() for metric in self._metrics) + '\n'
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    'http_request_duration_seconds', 'Latency of HTTP requests by endpoint',
+    ['endpoint', 'method', 'status']
+))
+plan_duration = registry.register(Histogram(
+    'plan_generation_duration_seconds', 'Time to generate a learning plan by engine', ['engine']
+))
+plans_generated = registry.register(Counter(
+    'plans_generated_total', 'Learning plans generated by engine and outcome', ['engine', 'outcome']
+))
+plan_fallbacks = registry.register(Counter(
+    'plan_fallbacks_total', 'Agent plans not returned as clean JSON, by how they were recovered (answer, tool_history, synthetic, error)', ['kind']
+))
+plans_degraded = registry.register(Counter(
+    'plans_degraded_total', 'Plan requests answered by the fast-path engine instead of the LLM', ['reason']
+))
+agent_iterations = registry.register(Histogram(
+    'agent_iterations', 'LLM round-trips (ReAct iterations) per agent plan', [],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 50)
+))
+llm_calls = registry.register(Counter(
+    'llm_calls_total', 'LLM calls by outcome', ['outcome']
+))
+llm_duration = registry.register(Histogram(
+    'llm_call_duration_seconds', 'Latency of individual LLM calls'
+))
+llm_tokens = registry.register(Counter(
+    'llm_tokens_total', 'LLM tokens used', ['kind']
+))
+tool_calls = registry.register(Counter(
+    'tool_calls_total', 'Search tool calls by tool and outcome (hit, miss, fallback, error)', ['tool', 'outcome']
+))
+tool_duration = registry.register(Histogram(
+    'tool_call_duration_seconds', 'Latency of search tool calls that reached the upstream', ['tool']
+))
+tool_empty_results = registry.register(Counter(
+    'tool_empty_results_total', 'Search tool calls that returned no results', ['tool']
+))
+admission_requests = registry.register(Counter(
+    'admission_requests_total',
+    'Plan requests at admission control by outcome (admitted, queue_full, client_limit, timeout)',
+    ['outcome']
+))
+admission_wait = registry.register(Histogram(
+    'admission_wait_seconds', 'Time admitted plan requests waited for a slot'
+))
+lane_rejections = registry.register(Counter(
+    'lane_rejections_total', 'Requests turned away because their executor lane was full', ['lane']
+))
+serp_requests = registry.register(Counter(
+    'serp_requests_total',
+    'SerpAPI gateway searches by outcome (hit, upstream, error, rate_limited, quota_exhausted, no_api_key)',
+    ['outcome']
+))
+
+
+class PlanCounters:
+    """Per-plan tallies collected while a plan is being generated"""
+
+    def __init__(self):
+        self.llm_calls = 0
+
+
+# Counters of the plan being generated in the current context, if any
+current_plan: ContextVar[Optional[PlanCounters]] = ContextVar('current_plan_counters', default=None)
+
+# Start times of the LLM calls in progress in this context (outermost first)
+_llm_calls_in_progress: ContextVar[Tuple[float, ...]] = ContextVar('llm_calls_in_progress', default=())
+
+
+def llm_call_started():
+    _llm_calls_in_progress.set(_llm_calls_in_progress.get() + (time.perf_counter(),))
+
+
+def llm_call_finished(response: Any = None, error: bool = False):
+    """
+    Record an LLM call; calls nested inside another one (chat wrapping complete) are not counted twice
+    """
+    in_progress = _llm_calls_in_progress.get()
+    if not in_progress:
+        return
+    _llm_calls_in_progress.set(in_progress[:-1])
+    if len(in_progress) > 1:
+        return
+
+    llm_duration.observe(time.perf_counter() - in_progress[0])
+    llm_calls.inc(outcome='error' if error else 'ok')
+    plan = current_plan.get()
+    if plan is not None:
+        plan.llm_calls += 1
+
+    usage = (getattr(response, 'raw', None) or {}).get('usage_metadata') if response is not None else None
+    if isinstance(usage, dict):
+        llm_tokens.inc(usage.get('prompt_token_count', 0), kind='prompt')
+        llm_tokens.inc(usage.get('candidates_token_count', 0), kind='completion')
+
+
+def install_llm_instrumentation():
+    """
+    Feed llama_index LLM events into the LLM metrics
+    """
+    from llama_index.core.instrumentation import get_dispatcher
+    from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+    from llama_index.core.instrumentation.events.llm import (
+        LLMChatEndEvent,
+        LLMChatStartEvent,
+        LLMCompletionEndEvent,
+        LLMCompletionStartEvent,
+    )
+    from llama_index.core.instrumentation.events.span import SpanDropEvent
+
+    class LLMMetricsHandler(BaseEventHandler):
+        @classmethod
+        def class_name(cls) -> str:
+            return 'LLMMetricsHandler'
+
+        def handle(self, event, **kwargs):
+            if isinstance(event, (LLMChatStartEvent, LLMCompletionStartEvent)):
+                llm_call_started()
+            elif isinstance(event, (LLMChatEndEvent, LLMCompletionEndEvent)):
+                llm_call_finished(event.response)
+            elif isinstance(event, SpanDropEvent) and _llm_calls_in_progress.get():
+                llm_call_finished(error=True)
+
+    get_dispatcher().add_event_handler(LLMMetricsHandler())
@@ -1,7 +1,45 @@
+import json
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 
+def _slotted(cls):
+    """
+    Rebuild a dataclass with __slots__, like dataclass(slots=True) on Python 3.10+
+
+    Instances then carry no per-object __dict__, which matters when thousands of
+    50-step plans sit in the plan cache.
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = {
+        key: value for key, value in cls.__dict__.items()
+        if key not in names and key not in ('__dict__', '__weakref__')
+    }
+    namespace['__slots__'] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+# Coercions applied while decoding, so that a plan is validated in a single pass
+def _text(value: Any, default: str = '') -> str:
+    if value is None:
+        return default
+    return value if isinstance(value, str) else str(value)
+
+def _optional_text(value: Any) -> Optional[str]:
+    return None if value is None else _text(value)
+
+def _int(value: Any, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+def _dicts(value: Any) -> List[Dict[str, Any]]:
+    return [item for item in value if isinstance(item, dict)] if isinstance(value, list) else []
+
+@_slotted
 @dataclass
 class Resource:
     """Resource for a learning step"""
@@ -9,7 +47,27 @@ class Resource:
     url: str
     type: str  # 'article', 'video', 'exercise', etc.
     description: Optional[str] = None
+    thumbnail: Optional[str] = None
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Resource':
+        return cls(
+            title=_text(data.get('title')),
+            url=_text(data.get('url')),
+            type=_text(data.get('type'), 'article'),
+            description=_optional_text(data.get('description')),
+            thumbnail=_optional_text(data.get('thumbnail'))
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        resource = {'title': self.title, 'url': self.url, 'type': self.type}
+        if self.description is not None:
+            resource['description'] = self.description
+        if self.thumbnail is not None:
+            resource['thumbnail'] = self.thumbnail
+        return resource
 
+@_slotted
 @dataclass
 class Step:
     """Individual learning step"""
@@ -22,7 +80,37 @@ class Step:
     expected_outcome: str
     milestone_id: str
     completed: bool = False
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Step':
+        return cls(
+            id=_text(data.get('id')),
+            title=_text(data.get('title')),
+            description=_text(data.get('description')),
+            time_estimate=_text(data.get('time_estimate')),
+            difficulty=_text(data.get('difficulty')),
+            resources=[Resource.from_dict(r) for r in _dicts(data.get('resources'))],
+            expected_outcome=_text(data.get('expected_outcome')),
+            milestone_id=_text(data.get('milestone_id')),
+            completed=bool(data.get('completed', False))
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        step = {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'time_estimate': self.time_estimate,
+            'difficulty': self.difficulty,
+            'resources': [r.to_dict() for r in self.resources],
+            'expected_outcome': self.expected_outcome,
+            'milestone_id': self.milestone_id
+        }
+        if self.completed:
+            step['completed'] = True
+        return step
 
+@_slotted
 @dataclass
 class Milestone:
     """Learning milestone"""
@@ -32,8 +120,35 @@ class Milestone:
     duration_weeks: int
     start_week: int
     end_week: int
-    steps: List[Step] = None
+    steps: Optional[List[Step]] = None
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Milestone':
+        steps = data.get('steps')
+        return cls(
+            id=_text(data.get('id')),
+            name=_text(data.get('name')),
+            description=_text(data.get('description')),
+            duration_weeks=_int(data.get('duration_weeks')),
+            start_week=_int(data.get('start_week')),
+            end_week=_int(data.get('end_week')),
+            steps=[Step.from_dict(s) for s in _dicts(steps)] if steps is not None else None
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        milestone = {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'duration_weeks': self.duration_weeks,
+            'start_week': self.start_week,
+            'end_week': self.end_week
+        }
+        if self.steps is not None:
+            milestone['steps'] = [s.to_dict() for s in self.steps]
+        return milestone
 
+@_slotted
 @dataclass
 class Timeline:
     """Learning timeline"""
@@ -41,16 +156,82 @@ class Timeline:
     start_date: str
     end_date: str
     milestones: List[Milestone]
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Timeline':
+        return cls(
+            estimated_weeks=_int(data.get('estimated_weeks')),
+            start_date=_text(data.get('start_date')),
+            end_date=_text(data.get('end_date')),
+            milestones=[Milestone.from_dict(m) for m in _dicts(data.get('milestones'))]
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'estimated_weeks': self.estimated_weeks,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'milestones': [m.to_dict() for m in self.milestones]
+        }
 
+@_slotted
 @dataclass
 class LearningPlan:
     """Complete learning plan"""
-    id: str
+    id: Optional[str]  # Set once the plan is stored
     goal: str
     skill: str
     timeline: Timeline
-    created_at: str = datetime.now().isoformat()
-    updated_at: str = datetime.now().isoformat()
+    steps: List[Step] = field(default_factory=list)  # All steps, in plan order
+    created_at: str = field(default_factory=_now)
+    updated_at: str = field(default_factory=_now)
+    degraded: Optional[str] = None  # Why the fast-path engine was used instead of the LLM
+    error: Optional[str] = None  # Set on the last-resort plan built when generation failed
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LearningPlan':
+        """
+        Build a plan from a plan engine's or the API's dictionary shape
+        
+        Missing fields get empty defaults and values are coerced to their declared
+        types, so anything that decodes is safe to serialize and store.
+        """
+        timeline = data.get('timeline')
+        created_at = _text(data.get('created_at')) or _now()
+        return cls(
+            id=_optional_text(data.get('id')),
+            goal=_text(data.get('goal')),
+            skill=_text(data.get('skill')),
+            timeline=Timeline.from_dict(timeline if isinstance(timeline, dict) else {}),
+            steps=[Step.from_dict(s) for s in _dicts(data.get('steps'))],
+            created_at=created_at,
+            updated_at=_text(data.get('updated_at')) or created_at,
+            degraded=_optional_text(data.get('degraded')),
+            error=_optional_text(data.get('error'))
+        )
+    
+    @classmethod
+    def from_json(cls, text: str) -> 'LearningPlan':
+        return cls.from_dict(json.loads(text))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        plan = {'id': self.id} if self.id is not None else {}
+        plan.update({
+            'goal': self.goal,
+            'skill': self.skill,
+            'timeline': self.timeline.to_dict(),
+            'steps': [s.to_dict() for s in self.steps],
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        })
+        if self.degraded is not None:
+            plan['degraded'] = self.degraded
+        if self.error is not None:
+            plan['error'] = self.error
+        return plan
+    
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), separators=(',', ':'))
 
 # JSON schemas for validation
 SKILL_LEVEL_SCHEMA = {
@@ -0,0 +1,153 @@
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from agent import PlanEventStream, get_llm
+from config import Config
+from event_loop import run_sync
+from models import LearningPlan
+from research import SharedLookups, research_steps_async
+from tools import generate_timeline, format_learning_plan
+
+# One skeleton call, plus a single retry if the JSON comes back unusable
+MAX_LLM_CALLS = 2
+
+STEP_FIELDS = ['title', 'description', 'time_estimate', 'difficulty', 'expected_outcome', 'milestone_id']
+
+
+def generate_steps_pipeline(
+    goal: str,
+    skill: str,
+    skill_level: Dict[str, str],
+    commitment_level: str,
+    on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    timeline: Optional[Dict[str, Any]] = None,
+    lookups: Optional[SharedLookups] = None
+) -> LearningPlan:
+    """
+    Generate a learning plan with a fixed pipeline instead of a free-form ReAct loop.
+
+    The timeline is computed locally, a single structured-output LLM call lays out
+    the steps for every milestone, resources are researched in code and the result
+    goes through format_learning_plan. That bounds the LLM calls per plan to
+    MAX_LLM_CALLS. Takes the same arguments and returns the same shape as
+    agent.generate_steps; batch callers can also pass a precomputed timeline and
+    a SharedLookups to share resource research with other plans.
+
+    Blocking version of generate_steps_pipeline_async: the generation runs on the
+    shared event loop while the calling thread waits for it, for up to
+    Config.PLAN_TIMEOUT seconds.
+    """
+    return run_sync(generate_steps_pipeline_async(
+        goal, skill, skill_level, commitment_level, on_event=on_event, timeline=timeline, lookups=lookups
+    ), timeout=Config.PLAN_TIMEOUT)
+
+
+async def generate_steps_pipeline_async(
+    goal: str,
+    skill: str,
+    skill_level: Dict[str, str],
+    commitment_level: str,
+    on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    timeline: Optional[Dict[str, Any]] = None,
+    lookups: Optional[SharedLookups] = None
+) -> LearningPlan:
+    """
+    generate_steps_pipeline as a coroutine, for callers already on the event loop
+    """
+    stream = PlanEventStream(on_event, defer_steps=True) if on_event else None
+
+    if timeline is None:
+        timeline = generate_timeline(skill_level=skill_level, commitment_level=commitment_level)
+    if stream is not None:
+        stream.timeline(timeline)
+
+    steps = await request_step_skeleton(goal, skill, skill_level, commitment_level, timeline)
+
+    # Pads the plan with templates if the LLM came back with too few steps
+    plan = LearningPlan.from_dict(format_learning_plan(goal=goal, skill=skill, timeline=timeline, steps=steps))
+
+    await research_steps_async(plan.steps, skill, on_step=stream.step if stream else None, lookups=lookups)
+
+    if stream is not None:
+        stream.finish(plan)
+    return plan
+
+
+async def request_step_skeleton(
+    goal: str,
+    skill: str,
+    skill_level: Dict[str, str],
+    commitment_level: str,
+    timeline: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """
+    Ask the LLM for the steps of every milestone in one JSON response
+
+    Returns:
+        List of step dictionaries without resources (empty if the LLM never
+        produced usable JSON)
+    """
+    llm = get_llm(json_mode=True)
+
+    milestones = "\n".join(
+        f"    - {m['id']}: {m['name']} ({m['duration_weeks']} weeks) - {m['description']}"
+        for m in timeline['milestones']
+    )
+
+    prompt = f"""
+    You are an AI learning path planner. Create the action steps of a personalized learning plan.
+
+    The user wants to {goal}. They want to learn {skill}.
+    Their current skill level is: {skill_level['current']}
+    Their target skill level is: {skill_level['target']}
+    Their commitment level is: {commitment_level}
+
+    The plan has these milestones:
+{milestones}
+
+    Create 3-4 concrete, specific steps for EACH milestone, building on each other in increasing
+    difficulty, with a TOTAL of at least {Config.MIN_STEPS} and at most {Config.MAX_STEPS} steps.
+
+    Respond with ONLY a JSON object of the form:
+    {{"steps": [{{"title": "...", "description": "2-3 sentences", "time_estimate": "e.g. 3 days",
+    "difficulty": "Easy|Medium|Hard", "expected_outcome": "...", "milestone_id": "milestone-1"}}]}}
+    """
+
+    for attempt in range(MAX_LLM_CALLS):
+        try:
+            response = await llm.acomplete(prompt)
+            steps = parse_step_skeleton(response.text, timeline)
+            if steps:
+                return steps
+            print(f"Warning: Skeleton response had no usable steps (attempt {attempt + 1})")
+        except Exception as e:
+            print(f"Skeleton generation error (attempt {attempt + 1}): {str(e)}")
+
+    return []
+
+
+def parse_step_skeleton(text: str, timeline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Parse and clean up the steps of a skeleton response
+    """
+    text = text.strip()
+    fenced = re.search(r'```(?:json)?\s*(.*?)```', text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1).strip()
+
+    data = json.loads(text)
+    raw_steps = data.get('steps', []) if isinstance(data, dict) else data
+
+    milestone_ids = [m['id'] for m in timeline['milestones']]
+    steps = []
+    for raw in raw_steps[:Config.MAX_STEPS]:
+        if not isinstance(raw, dict) or not raw.get('title'):
+            continue
+        step = {field: raw[field] for field in STEP_FIELDS if raw.get(field)}
+        step['id'] = f"step-{len(steps) + 1}"
+        if milestone_ids and step.get('milestone_id') not in milestone_ids:
+            step['milestone_id'] = milestone_ids[0]
+        step['resources'] = []
+        steps.append(step)
+    return steps
@@ -0,0 +1,210 @@
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+_CLOSERS = {'{': '}', '[': ']'}
+
+
+def iter_json_candidates(text: str) -> Iterator[str]:
+    """
+    Yield every top-level JSON object or array in text, repaired where possible
+
+    One linear pass over the text: prose and markdown fences around the JSON are
+    skipped, whitespace outside strings is dropped, trailing commas are removed,
+    mismatched closers close the brackets they skip, and an object cut off at the
+    end of the text is closed after the last complete value.
+    """
+    buf: List[str] = []
+    stack: List[str] = []
+    in_string = escape = pending_comma = False
+    # Length of buf at the last complete value, and what closes it from there
+    safe_len = 0
+    safe_closers = ''
+
+    for ch in text:
+        if not stack:
+            if ch in _CLOSERS:
+                stack.append(_CLOSERS[ch])
+                buf = [ch]
+                in_string = escape = pending_comma = False
+                safe_len = 0
+            continue
+
+        if in_string:
+            buf.append(ch)
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch in ' \t\r\n':
+            continue
+        if ch == ',':
+            pending_comma = True
+            continue
+
+        if ch in '}]':
+            if ch not in stack:
+                continue
+            # Trailing commas are dropped, skipped brackets are closed
+            pending_comma = False
+            while stack[-1] != ch:
+                buf.append(stack.pop())
+            buf.append(stack.pop())
+            if not stack:
+                yield ''.join(buf)
+                buf = []
+                continue
+            safe_len = len(buf)
+            safe_closers = ''.join(reversed(stack))
+            continue
+
+        if pending_comma:
+            buf.append(',')
+            pending_comma = False
+        if ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+        elif ch == '"':
+            in_string = True
+        buf.append(ch)
+
+    # Truncated output: keep everything up to the last complete value
+    if stack and safe_len:
+        yield ''.join(buf[:safe_len]) + safe_closers
+
+
+def _step_count(value: Any) -> int:
+    if not isinstance(value, list):
+        return 0
+    return sum(1 for item in value if isinstance(item, dict) and item.get('title'))
+
+
+def _find_plans(value: Any, found: List[Dict[str, Any]]):
+    """Collect dicts with a list of steps (and bare lists of steps) nested anywhere in value"""
+    if isinstance(value, dict):
+        if _step_count(value.get('steps')):
+            found.append(value)
+        for key, child in value.items():
+            if key != 'steps' and isinstance(child, (dict, list)):
+                _find_plans(child, found)
+    elif isinstance(value, list):
+        if _step_count(value):
+            found.append({'steps': value})
+            return
+        for child in value:
+            if isinstance(child, (dict, list)):
+                _find_plans(child, found)
+
+
+def extract_plan(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Recover the largest plan object from LLM output that may not be clean JSON
+
+    Handles markdown fences, surrounding prose, trailing commas, unescaped control
+    characters and output cut off mid-object. A plan is any object with a list of
+    steps; the one with the most titled steps wins, and only those steps are kept.
+
+    Args:
+        text: Raw LLM output
+
+    Returns:
+        The plan dictionary, or None if no steps could be recovered
+    """
+    if not isinstance(text, str):
+        return None
+
+    best = None
+    best_count = 0
+    for candidate in iter_json_candidates(text):
+        try:
+            value = json.loads(candidate, strict=False)
+        except ValueError:
+            continue
+        plans: List[Dict[str, Any]] = []
+        _find_plans(value, plans)
+        for plan in plans:
+            count = _step_count(plan['steps'])
+            if count > best_count:
+                best, best_count = plan, count
+
+    if best is None:
+        return None
+    best['steps'] = [s for s in best['steps'] if isinstance(s, dict) and s.get('title')]
+    return best
+
+
+def extract_plan_from_tools(sources: List[Any]) -> Optional[Dict[str, Any]]:
+    """
+    Recover a plan from the agent's tool calls when its final answer has none
+
+    The last successful format_learning_plan output is used as is. Otherwise the
+    steps the agent passed to format_learning_plan (even in calls that failed) are
+    recovered, along with the goal, skill and timeline it passed or the last
+    generate_timeline output.
+
+    Args:
+        sources: ToolOutput objects from the agent response, in call order
+
+    Returns:
+        A possibly incomplete plan dictionary, or None if no steps were found
+    """
+    best = None
+    best_count = 0
+    timeline = None
+
+    for source in sources or []:
+        name = getattr(source, 'tool_name', None)
+        is_error = getattr(source, 'is_error', False)
+        raw_output = getattr(source, 'raw_output', None)
+
+        if name == 'generate_timeline' and not is_error and isinstance(raw_output, dict):
+            timeline = raw_output
+            continue
+        if name != 'format_learning_plan':
+            continue
+
+        if not is_error and isinstance(raw_output, dict) and _step_count(raw_output.get('steps')):
+            best, best_count = raw_output, len(raw_output['steps']) + 1  # Finished plans win ties
+            continue
+
+        kwargs = (getattr(source, 'raw_input', None) or {}).get('kwargs') or {}
+        steps = kwargs.get('steps')
+        if isinstance(steps, str):
+            # Arguments the agent serialized as a string get the same tolerant parsing
+            steps = (extract_plan(steps) or {}).get('steps')
+        count = _step_count(steps)
+        if count and count >= best_count:
+            best = {key: kwargs[key] for key in ('goal', 'skill', 'timeline') if kwargs.get(key)}
+            best['steps'] = [s for s in steps if isinstance(s, dict) and s.get('title')]
+            best_count = count
+
+    if best is None:
+        return None
+    if not isinstance(best.get('timeline'), dict) and timeline is not None:
+        best = dict(best, timeline=timeline)
+    return best
+
+
+def outline_lines(text: str, limit: int = 10) -> List[str]:
+    """
+    Pull step titles out of a plain-text answer in one pass over its lines
+
+    Lines like "Step 3: ..." or "Task 3: ..." are preferred, then bullet points,
+    then up to `limit` of any other non-heading lines.
+    """
+    numbered, bullets, lines = [], [], []
+    for line in (text or '').splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        head, _, rest = line.partition(':')
+        words = head.split()
+        if len(words) == 2 and words[0].lower() in ('step', 'task') and words[1].isdigit() and rest.strip():
+            numbered.append(rest.strip())
+        elif line[0] in '-*•' and line[1:].strip():
+            bullets.append(line[1:].strip())
+        else:
+            lines.append(line)
+    return numbered or bullets or lines[:limit]
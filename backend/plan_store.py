@@ -0,0 +1,131 @@
+import os
+import sqlite3
+import threading
+import uuid
+from dataclasses import replace
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from models import LearningPlan
+
+
+class PlanStore:
+    """
+    Durable store of generated learning plans in SQLite
+
+    Plans are stored as LearningPlan JSON, with the id, skill and creation time in
+    indexed columns so that fetching a plan or listing recent plans (optionally for
+    one skill) is a single indexed query. Connections are per thread and per
+    process, as in SQLiteCache, and like it the table is pruned every so often.
+
+    Args:
+        path: Database file path
+        ttl: Seconds a plan is kept
+        max_plans: Upper bound on stored plans; the oldest are pruned beyond it
+    """
+
+    def __init__(self, path: str, ttl: float = 30 * 24 * 3600, max_plans: int = 10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_plans = max_plans
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and getattr(self._local, 'pid', None) == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS plans ('
+            'id TEXT PRIMARY KEY, skill TEXT NOT NULL COLLATE NOCASE, goal TEXT NOT NULL, '
+            'step_count INTEGER NOT NULL, created_at TEXT NOT NULL, data TEXT NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_plans_created ON plans (created_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_plans_skill_created ON plans (skill, created_at)')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def save(self, plan: LearningPlan) -> str:
+        """
+        Store a generated plan under a new id
+
+        Args:
+            plan: Plan as returned by a plan engine; it is not modified, since
+                cached plans are shared between requests
+
+        Returns:
+            The new plan id
+        """
+        now = datetime.now().isoformat()
+        stored = replace(plan, id=uuid.uuid4().hex, created_at=now, updated_at=now)
+        self._connect().execute(
+            'INSERT INTO plans (id, skill, goal, step_count, created_at, data) VALUES (?, ?, ?, ?, ?, ?)',
+            (stored.id, stored.skill.strip(), stored.goal, len(stored.steps), stored.created_at, stored.to_json())
+        )
+        # Pruning scans the created_at index, so only do it every so often
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % 100 == 0
+        if prune:
+            self.prune()
+        return stored.id
+
+    def prune(self) -> int:
+        """
+        Drop plans older than the TTL and trim the table down to max_plans
+
+        Returns:
+            The number of plans removed
+        """
+        conn = self._connect()
+        cutoff = (datetime.now() - timedelta(seconds=self.ttl)).isoformat()
+        removed = conn.execute('DELETE FROM plans WHERE created_at < ?', (cutoff,)).rowcount
+        removed += conn.execute(
+            'DELETE FROM plans WHERE id IN ('
+            'SELECT id FROM plans ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_plans,)
+        ).rowcount
+        return removed
+
+    def get(self, plan_id: str) -> Optional[LearningPlan]:
+        """Return the stored plan with this id, or None"""
+        row = self._connect().execute('SELECT data FROM plans WHERE id = ?', (plan_id,)).fetchone()
+        return LearningPlan.from_json(row[0]) if row else None
+
+    def list(self, skill: Optional[str] = None, limit: int = 20, before: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Summaries of stored plans, newest first
+
+        Args:
+            skill: Only plans for this skill (case-insensitive)
+            limit: Maximum number of plans returned
+            before: Only plans created before this ISO timestamp, for paging
+
+        Returns:
+            List of dicts with id, skill, goal, step_count and created_at
+        """
+        clauses, params = [], []
+        if skill:
+            clauses.append('skill = ?')
+            params.append(skill.strip())
+        if before:
+            clauses.append('created_at < ?')
+            params.append(before)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ''
+        rows = self._connect().execute(
+            f'SELECT id, skill, goal, step_count, created_at FROM plans {where}ORDER BY created_at DESC LIMIT ?',
+            params + [limit]
+        ).fetchall()
+        return [
+            {'id': row[0], 'skill': row[1], 'goal': row[2], 'step_count': row[3], 'created_at': row[4]}
+            for row in rows
+        ]
+
+
+plan_store = PlanStore(Config.PLAN_STORE_PATH, ttl=Config.PLAN_STORE_TTL, max_plans=Config.PLAN_STORE_MAX_PLANS)
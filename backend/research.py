@@ -0,0 +1,181 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from cache import make_key
+from config import Config
+from models import Resource, Step
+from tools import search_web_async, search_wikipedia_async, search_youtube_async
+
+# Placeholder resources inserted by format_learning_plan and the agent fallback
+PLACEHOLDER_HOST = 'example.com'
+
+
+def step_query(step: Step, skill: Optional[str] = None) -> str:
+    """
+    Build the search query used to research a step
+    """
+    title = step.title.strip()
+    if skill and skill.lower() not in title.lower():
+        return f"{skill} {title}".strip()
+    return title
+
+
+def to_resources(source: str, results: List[Dict[str, str]]) -> List[Resource]:
+    """
+    Convert search tool results into step resources
+    """
+    resources = []
+    for result in results or []:
+        if source == 'wikipedia':
+            resources.append(Resource(
+                title=result.get('title', ''),
+                url=result.get('url', ''),
+                type='article',
+                description=result.get('summary', '')
+            ))
+        elif source == 'web':
+            resources.append(Resource(
+                title=result.get('title', ''),
+                url=result.get('link', ''),
+                type='article',
+                description=result.get('snippet', '')
+            ))
+        elif source == 'youtube':
+            resources.append(Resource(
+                title=result.get('title', ''),
+                url=result.get('url', ''),
+                type='video',
+                description=result.get('description', ''),
+                thumbnail=result.get('thumbnail', '')
+            ))
+    return [r for r in resources if r.url]
+
+
+def merge_resources(existing: List[Resource], found: List[Resource]) -> List[Resource]:
+    """
+    Merge researched resources into a step's resources
+
+    Placeholder links are dropped once real ones are available, and duplicates
+    (by URL) are skipped.
+    """
+    existing = existing or []
+    if found:
+        existing = [r for r in existing if PLACEHOLDER_HOST not in r.url]
+    merged = []
+    seen = set()
+    for resource in existing + found:
+        if resource.url in seen:
+            continue
+        seen.add(resource.url)
+        merged.append(resource)
+    return merged
+
+
+class SharedLookups:
+    """
+    Deduplicates tool lookups across the steps of many plans
+
+    Every distinct (tool, normalized query, max_results) runs once; later requests
+    for it reuse the same task, even while the first lookup is still running. The
+    plans sharing it must all run on the shared event loop.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self.requested = 0
+        self.executed = 0
+
+    def lookup(self, run: Callable[..., Awaitable[Any]], fn: Callable[..., Any], query: str, max_results: int) -> asyncio.Future:
+        """
+        Task for fn(query, max_results), started with run(fn, query, max_results)
+        unless an identical lookup already exists
+        """
+        key = make_key(fn.__name__, query, max_results)
+        self.requested += 1
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(run(fn, query, max_results))
+            self.executed += 1
+        return task
+
+
+def _sources():
+    return [
+        ('wikipedia', search_wikipedia_async, Config.RESEARCH_WIKIPEDIA_RESULTS),
+        ('web', search_web_async, Config.RESEARCH_WEB_RESULTS),
+        ('youtube', search_youtube_async, Config.RESEARCH_YOUTUBE_RESULTS)
+    ]
+
+
+async def research_steps_async(
+    steps: List[Step],
+    skill: Optional[str] = None,
+    max_concurrency: Optional[int] = None,
+    on_step: Optional[Callable[[Step], None]] = None,
+    lookups: Optional[SharedLookups] = None
+) -> List[Step]:
+    """
+    Research resources for all steps at once as tasks on the event loop
+
+    Every step gets one Wikipedia, web and YouTube lookup, all running concurrently,
+    and the results are merged into the step's resources in place. Identical
+    lookups run once, and at most max_concurrency of this plan's lookups run at
+    a time.
+
+    Args:
+        steps: Plan steps
+        skill: The skill being learned, used to qualify step titles in queries
+        max_concurrency: Lookups running at once (defaults to Config.RESEARCH_WORKERS)
+        on_step: Optional callback invoked with each step once its research is merged
+        lookups: Optional SharedLookups to share identical lookups with other plans
+
+    Returns:
+        The same list of steps, with resources filled in
+    """
+    sources = _sources()
+    semaphore = asyncio.Semaphore(max_concurrency or Config.RESEARCH_WORKERS)
+    if lookups is None:
+        lookups = SharedLookups()
+
+    async def run(fn: Callable[..., Any], query: str, max_results: int) -> List[Dict[str, str]]:
+        async with semaphore:
+            return await fn(query, max_results)
+
+    step_tasks = [
+        [(source, lookups.lookup(run, fn, step_query(step, skill), max_results)) for source, fn, max_results in sources]
+        for step in steps
+    ]
+
+    # Merge in step order so streamed steps keep the plan's ordering
+    for step, tasks in zip(steps, step_tasks):
+        found = []
+        for source, task in tasks:
+            try:
+                found.extend(to_resources(source, await task))
+            except Exception as e:
+                print(f"Research error ({source}): {str(e)}")
+        step.resources = merge_resources(step.resources, found)
+        if on_step is not None:
+            on_step(step)
+
+    return steps
+
+
+def attach_cached_resources(steps: List[Step], skill: Optional[str] = None) -> List[Step]:
+    """
+    Fill in step resources from the tool caches only, never calling an upstream
+
+    Uses the same queries as research_steps_async, so any step researched before
+    for the same skill gets its resources back. Steps with nothing cached keep
+    theirs.
+    """
+    sources = _sources()
+    for step in steps:
+        query = step_query(step, skill)
+        found = []
+        for source, fn, max_results in sources:
+            lookup = getattr(fn, 'lookup', None)
+            results = lookup(query, max_results) if lookup else None
+            found.extend(to_resources(source, results))
+        step.resources = merge_resources(step.resources, found)
+    return steps
@@ -0,0 +1,292 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from cache import make_key
+from config import Config
+from event_loop import synchronous
+from http_client import async_session
+import metrics
+from tool_cache import build_backend
+import wiki_proxy
+
+
+class SerpBudgetError(Exception):
+    """
+    Raised when a SerpAPI search can't be spent right now
+
+    Attributes:
+        reason: 'no_api_key', 'quota' (daily budget used up) or 'rate' (no token
+            within Config.SERP_RATE_WAIT)
+    """
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter
+
+    Args:
+        rate: Tokens added per second
+        burst: Maximum tokens held, i.e. the largest burst allowed after an idle period
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self) -> float:
+        """Take a token if there is one; otherwise return the seconds until there will be"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate if self.rate > 0 else float('inf')
+
+    async def acquire_async(self, timeout: float = 0) -> bool:
+        """
+        Take a token, waiting up to timeout seconds for one without blocking the event loop
+
+        Returns:
+            Whether a token was taken
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class DailyQuota:
+    """
+    Number of searches that may be spent per UTC day
+
+    Usage is counted in SQLite (in the cache database) so that every worker
+    process draws from the same budget; without a database path it is counted in
+    memory, per process.
+
+    Args:
+        limit: Searches allowed per day
+        path: SQLite database file, or None
+    """
+
+    def __init__(self, limit: int, path: Optional[str] = None):
+        self.limit = limit
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._memory = {}
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).date().isoformat()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and getattr(self._local, 'pid', None) == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS serp_usage (day TEXT PRIMARY KEY, used INTEGER NOT NULL)')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def used(self) -> int:
+        day = self._today()
+        if not self.path:
+            with self._lock:
+                return self._memory.get(day, 0)
+        row = self._connect().execute('SELECT used FROM serp_usage WHERE day = ?', (day,)).fetchone()
+        return row[0] if row else 0
+
+    def consume(self) -> bool:
+        """
+        Spend one search from today's budget
+
+        Returns:
+            False, without spending anything, if the budget is used up
+        """
+        day = self._today()
+        if not self.path:
+            with self._lock:
+                if self._memory.get(day, 0) >= self.limit:
+                    return False
+                self._memory = {day: self._memory.get(day, 0) + 1}
+                return True
+
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT used FROM serp_usage WHERE day = ?', (day,)).fetchone()
+            used = row[0] if row else 0
+            if used >= self.limit:
+                return False
+            conn.execute(
+                'INSERT INTO serp_usage (day, used) VALUES (?, 1) '
+                'ON CONFLICT(day) DO UPDATE SET used = used + 1',
+                (day,)
+            )
+            # Older days are only needed for the current one
+            conn.execute('DELETE FROM serp_usage WHERE day < ?', (day,))
+            return True
+        finally:
+            conn.execute('COMMIT')
+
+
+class SerpGateway:
+    """
+    The one way the app talks to SerpAPI
+
+    Results are cached on the query and result count; a search that isn't cached
+    spends a token from the rate limiter and one search from the daily quota
+    before it reaches the upstream. Only the organic results are kept.
+
+    Args:
+        cache: Cache for organic results, or None
+        bucket: Rate limiter for upstream calls
+        quota: Daily search budget
+    """
+
+    def __init__(self, cache: Optional[Any], bucket: TokenBucket, quota: DailyQuota):
+        self.cache = cache
+        self.bucket = bucket
+        self.quota = quota
+
+    def cached(self, query: str, num: int) -> Optional[List[Dict[str, Any]]]:
+        """Cached organic results for this search, or None"""
+        if self.cache is None:
+            return None
+        return self.cache.get(make_key('serp', query, num))
+
+    async def search_async(self, query: str, num: int) -> List[Dict[str, Any]]:
+        """
+        Organic Google results for a query, from the cache or SerpAPI
+
+        Args:
+            query: Search query
+            num: Number of results to request
+
+        Returns:
+            List of dicts with title, link, snippet and position
+
+        Raises:
+            SerpBudgetError: If the search isn't cached and can't be spent right now
+        """
+        loop = asyncio.get_running_loop()
+        # Cache and quota reads and writes may wait on SQLite, so not on the event loop
+        results = await loop.run_in_executor(None, self.cached, query, num)
+        if results is not None:
+            metrics.serp_requests.inc(outcome='hit')
+            return results
+
+        if not Config.SERP_API_KEY:
+            metrics.serp_requests.inc(outcome='no_api_key')
+            raise SerpBudgetError('no_api_key', "SERP API key is not set")
+        if not await self.bucket.acquire_async(Config.SERP_RATE_WAIT):
+            metrics.serp_requests.inc(outcome='rate_limited')
+            raise SerpBudgetError('rate', "SerpAPI rate limit reached")
+        if not await loop.run_in_executor(None, self.quota.consume):
+            metrics.serp_requests.inc(outcome='quota_exhausted')
+            raise SerpBudgetError('quota', "Daily SerpAPI quota used up")
+
+        try:
+            response = await async_session().get(Config.SERP_API_URL, params={
+                "engine": "google",
+                "q": query,
+                "api_key": Config.SERP_API_KEY,
+                "num": num
+            })
+            response.raise_for_status()
+            data = response.json()
+        except Exception:
+            metrics.serp_requests.inc(outcome='error')
+            raise
+        metrics.serp_requests.inc(outcome='upstream')
+
+        results = [
+            {
+                'title': result.get('title', ''),
+                'link': result.get('link', ''),
+                'snippet': result.get('snippet', ''),
+                'position': result.get('position', None)
+            }
+            for result in data.get('organic_results', [])
+        ]
+        if self.cache is not None:
+            await loop.run_in_executor(None, self.cache.set, make_key('serp', query, num), results,
+                                       Config.WEB_CACHE_TTL if results else Config.TOOL_CACHE_NEGATIVE_TTL)
+        return results
+
+    search = synchronous(search_async)
+
+    def status(self) -> Dict[str, Any]:
+        """Today's budget and the tokens currently available"""
+        used = self.quota.used()
+        return {
+            'daily_limit': self.quota.limit,
+            'used_today': used,
+            'remaining_today': max(self.quota.limit - used, 0),
+            'rate_tokens': round(self.bucket.tokens(), 2)
+        }
+
+
+def fallback_results(query: str, num: int) -> List[Dict[str, Any]]:
+    """
+    What to return instead of SerpAPI results when the gateway won't spend a search
+
+    With Config.SERP_FALLBACK 'wikipedia', Wikipedia search results in the same
+    shape as organic results; with 'cached' (cached results only), nothing.
+    """
+    if Config.SERP_FALLBACK != 'wikipedia':
+        return []
+    return [
+        {
+            'title': page['title'],
+            'link': page['url'],
+            'snippet': page['summary'][:300],
+            'position': position
+        }
+        for position, page in enumerate(wiki_proxy.search(query, min(num, Config.WIKI_SEARCH_MAX_RESULTS)), 1)
+    ]
+
+
+async def fallback_results_async(query: str, num: int) -> List[Dict[str, Any]]:
+    """fallback_results for coroutines; the Wikipedia search cache is shared with threads, so it runs on one"""
+    return await asyncio.get_running_loop().run_in_executor(None, fallback_results, query, num)
+
+
+serp_gateway = SerpGateway(
+    build_backend(Config.TOOL_CACHE_BACKEND, 'serp_cache', Config.WEB_CACHE_TTL),
+    TokenBucket(Config.SERP_RATE_PER_SECOND, Config.SERP_RATE_BURST),
+    DailyQuota(Config.SERP_DAILY_QUOTA, Config.CACHE_DB_PATH or None)
+)
+
+metrics.registry.register(metrics.Gauge(
+    'serp_budget', "SerpAPI searches today: daily limit, used and remaining, and rate-limiter tokens available",
+    lambda: {(kind,): value for kind, value in serp_gateway.status().items()},
+    ['kind']
+))
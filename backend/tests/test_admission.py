@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected
+
+
+def controller(**kwargs):
+    options = dict(max_concurrent=1, max_queue=4, max_wait=5, max_per_client=4)
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+class Holder:
+    """Holds an admission slot on a thread until released"""
+
+    def __init__(self, ctl, client, order=None):
+        self.release = threading.Event()
+        self.error = None
+
+        def run():
+            try:
+                with ctl.admit(client):
+                    if order is not None:
+                        order.append(client)
+                    self.release.wait(5)
+            except AdmissionRejected as e:
+                self.error = e
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+
+    def finish(self):
+        self.release.set()
+        self.thread.join(5)
+
+
+def test_admits_up_to_max_concurrent_at_once():
+    ctl = controller(max_concurrent=2)
+    with ctl.admit('a'), ctl.admit('b'):
+        assert ctl.stats() == {'running': 2, 'waiting': 0, 'clients': 2}
+    assert ctl.stats()['running'] == 0
+
+
+def test_rejects_a_client_over_its_share_with_429():
+    ctl = controller(max_concurrent=4, max_per_client=1)
+    with ctl.admit('a'):
+        with pytest.raises(AdmissionRejected) as error:
+            with ctl.admit('a'):
+                pass
+        with ctl.admit('b'):
+            pass
+
+    assert (error.value.reason, error.value.status, error.value.client) == ('client_limit', 429, 'a')
+
+
+def test_rejects_with_503_when_the_queue_is_full():
+    ctl = controller(max_queue=1)
+    holder = Holder(ctl, 'a')
+    wait_for(lambda: ctl.stats()['running'] == 1)
+    waiter = Holder(ctl, 'b')
+    wait_for(lambda: ctl.stats()['waiting'] == 1)
+
+    with pytest.raises(AdmissionRejected) as error:
+        with ctl.admit('c'):
+            pass
+
+    assert (error.value.reason, error.value.status) == ('queue_full', 503)
+    assert error.value.retry_after >= 1
+    holder.finish()
+    waiter.finish()
+    assert waiter.error is None
+
+
+def test_times_out_waiting_for_a_slot():
+    ctl = controller(max_wait=0.05)
+    with ctl.admit('a'):
+        with pytest.raises(AdmissionRejected) as error:
+            with ctl.admit('b'):
+                pass
+
+    assert (error.value.reason, error.value.status) == ('timeout', 503)
+    assert ctl.stats() == {'running': 0, 'waiting': 0, 'clients': 0}
+
+
+def test_freed_slots_go_to_the_client_served_least():
+    ctl = controller()
+    order = []
+    holder = Holder(ctl, 'a', order)
+    wait_for(lambda: order == ['a'])
+    # 'a' queues first, but 'b' has not been served yet
+    waiters = [Holder(ctl, 'a', order)]
+    wait_for(lambda: ctl.stats()['waiting'] == 1)
+    waiters.append(Holder(ctl, 'b', order))
+    wait_for(lambda: ctl.stats()['waiting'] == 2)
+
+    holder.finish()
+    wait_for(lambda: len(order) == 2)
+    waiters[1].finish()
+    wait_for(lambda: len(order) == 3)
+    waiters[0].finish()
+
+    assert order == ['a', 'b', 'a']
@@ -0,0 +1,92 @@
+import pytest
+
+from cache import MemoryCache, SQLiteCache, TieredCache, make_key, plan_cache_key
+from models import LearningPlan
+
+
+@pytest.fixture
+def disk(tmp_path):
+    return SQLiteCache(str(tmp_path / 'cache.sqlite3'), table='test_cache')
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats.snapshot()['evictions'] == 1
+
+
+def test_memory_cache_expires_entries():
+    cache = MemoryCache()
+    cache.set('a', 1, ttl=-1)
+
+    assert cache.get('a', 'missing') == 'missing'
+    assert len(cache) == 0
+
+
+def test_sqlite_cache_round_trip_and_expiry(disk):
+    disk.set('a', {'x': [1, 2]})
+    disk.set('b', 'old', ttl=-1)
+
+    assert disk.get('a') == {'x': [1, 2]}
+    assert disk.get('b') is None
+    assert disk.stats.snapshot()['evictions'] == 1
+
+
+def test_sqlite_cache_treats_undecodable_rows_as_misses(tmp_path):
+    disk = SQLiteCache(str(tmp_path / 'cache.sqlite3'), table='plans',
+                       dumps=LearningPlan.to_json, loads=LearningPlan.from_json)
+    disk._connect().execute(
+        "INSERT INTO plans (key, value, expires_at, created_at) VALUES ('k', '{not json', 1e12, 0)"
+    )
+
+    assert disk.get('k') is None
+    assert disk._connect().execute("SELECT COUNT(*) FROM plans").fetchone()[0] == 0
+    assert disk.stats.snapshot()['misses'] == 1
+
+
+def test_sqlite_cache_prune_trims_to_max_entries(disk):
+    disk.max_entries = 2
+    for i in range(4):
+        disk.set(f'k{i}', i)
+    disk.prune()
+
+    assert [disk.get(f'k{i}') for i in range(4)].count(None) == 2
+
+
+def test_tiered_cache_promotes_disk_hits_into_memory(disk):
+    memory = MemoryCache()
+    cache = TieredCache(memory, disk)
+    disk.set('a', 'value')
+
+    assert cache.get('a') == 'value'
+    assert memory.get('a') == 'value'
+    assert cache.snapshot()['hits'] == 1
+
+
+def test_tiered_cache_writes_both_tiers_and_misses_when_expired(disk):
+    cache = TieredCache(MemoryCache(), disk)
+    cache.set('a', 'value', ttl=-1)
+
+    assert cache.get('a') is None
+    assert cache.snapshot()['misses'] == 1
+
+    cache.set('b', 'value')
+    cache.delete('b')
+    assert cache.get('b') is None
+
+
+def test_make_key_normalizes_strings():
+    assert make_key('plan', {'skill': '  Piano   Basics '}) == make_key('plan', {'skill': 'piano basics'})
+    assert make_key('plan', 'a') != make_key('plan', 'b')
+
+
+def test_plan_cache_key_depends_on_engine():
+    formatted_input = {'goal': 'g', 'skill': 'piano'}
+    assert plan_cache_key(formatted_input, 'agent') != plan_cache_key(formatted_input, 'pipeline')
@@ -0,0 +1,73 @@
+import pytest
+
+from config import Config
+from degrade import DegradePolicy
+from fast_path import search_links
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setattr(Config, 'GOOGLE_GENAI_API_KEY', 'key')
+
+
+def policy(**kwargs):
+    options = dict(max_in_flight=4, latency_slo=10, window=300, min_samples=3, max_samples=5, probe_fraction=0.25)
+    options.update(kwargs)
+    return DegradePolicy(**options)
+
+
+def test_degrades_without_an_api_key(monkeypatch):
+    monkeypatch.setattr(Config, 'GOOGLE_GENAI_API_KEY', None)
+
+    assert policy().reason(0) == 'no_api_key'
+
+
+def test_degrades_at_the_in_flight_limit():
+    assert policy().reason(3) is None
+    assert policy().reason(4) == 'queue_depth'
+
+
+def test_latency_needs_min_samples():
+    degrade = policy()
+    degrade.record(60)
+    degrade.record(60)
+
+    assert degrade.p90() is None
+    assert degrade.reason(0) is None
+
+
+def test_probes_the_llm_while_degraded_for_latency():
+    degrade = policy()
+    for _ in range(5):
+        degrade.record(60)
+
+    assert [degrade.reason(0) for _ in range(8)] == ['latency', 'latency', 'latency', None] * 2
+
+
+def test_recent_fast_samples_end_degradation_before_the_window():
+    degrade = policy()
+    for _ in range(5):
+        degrade.record(60)
+    assert degrade.p90() == 60
+
+    for _ in range(5):
+        degrade.record(1)
+
+    assert degrade.p90() == 1
+    assert degrade.reason(0) is None
+
+
+def test_probing_can_be_turned_off():
+    degrade = policy(probe_fraction=0)
+    for _ in range(5):
+        degrade.record(60)
+
+    assert {degrade.reason(0) for _ in range(10)} == {'latency'}
+
+
+def test_search_links_need_no_upstream():
+    resources = search_links('piano scales & chords')
+
+    assert [r.type for r in resources] == ['article', 'video']
+    assert resources[0].url == 'https://en.wikipedia.org/w/index.php?search=piano+scales+%26+chords'
+    assert resources[1].url == 'https://www.youtube.com/results?search_query=piano+scales+%26+chords'
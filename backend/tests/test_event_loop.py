@@ -0,0 +1,95 @@
+import asyncio
+import contextvars
+
+import pytest
+
+from event_loop import get_loop, run_sync, synchronous
+from research import SharedLookups
+
+request_id = contextvars.ContextVar('request_id', default=None)
+
+
+def test_run_sync_returns_results_and_raises_errors():
+    async def double(x):
+        await asyncio.sleep(0)
+        return x * 2
+
+    async def fail():
+        raise ValueError('boom')
+
+    assert run_sync(double(21)) == 42
+    with pytest.raises(ValueError):
+        run_sync(fail())
+
+
+def test_run_sync_sees_the_callers_context():
+    async def read():
+        return request_id.get()
+
+    token = request_id.set('abc')
+    try:
+        assert run_sync(read()) == 'abc'
+    finally:
+        request_id.reset(token)
+
+
+def test_run_sync_cancels_on_timeout():
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(TimeoutError):
+        run_sync(slow(), timeout=0.05)
+    run_sync(asyncio.wait_for(cancelled.wait(), 5))
+
+
+def test_run_sync_refuses_to_block_the_loop():
+    async def nested():
+        coroutine = asyncio.sleep(0)
+        try:
+            run_sync(coroutine)
+        finally:
+            coroutine.close()
+
+    with pytest.raises(RuntimeError):
+        run_sync(nested())
+
+
+def test_synchronous_strips_the_async_suffix():
+    async def search_async(query: str) -> str:
+        """Search for query"""
+        return query.upper()
+
+    search = synchronous(search_async)
+
+    assert search('piano') == 'PIANO'
+    assert search.__name__ == 'search'
+    assert search.__doc__ == 'Search for query'
+
+
+def test_shared_lookups_run_identical_lookups_once():
+    calls = []
+
+    async def search_async(query, max_results):
+        calls.append(query)
+        await asyncio.sleep(0)
+        return [query]
+
+    async def run(fn, query, max_results):
+        return await fn(query, max_results)
+
+    async def lookup_all():
+        lookups = SharedLookups()
+        tasks = [lookups.lookup(run, search_async, query, 3) for query in ('Piano', ' piano ', 'guitar')]
+        return lookups, await asyncio.gather(*tasks)
+
+    lookups, results = asyncio.run_coroutine_threadsafe(lookup_all(), get_loop()).result(5)
+
+    assert results == [['Piano'], ['Piano'], ['guitar']]
+    assert calls == ['Piano', 'guitar']
+    assert (lookups.executed, lookups.requested) == (2, 3)
@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+from config import Config
+from lanes import Lane, LaneFull, check_request_threads, lanes
+
+
+def test_lane_runs_tasks_and_reports_its_load():
+    lane = Lane('test', workers=1, max_queue=1)
+    release = threading.Event()
+    running = lane.submit(release.wait, 5)
+    queued = lane.submit(lambda: 'done')
+
+    stats = lane.stats()
+    assert (stats['active'] + stats['queued'], stats['full']) == (2, True)
+
+    release.set()
+    assert running.result(5) is True
+    assert queued.result(5) == 'done'
+    assert lane.stats()['saturation'] == 0
+    lane.shutdown()
+
+
+def test_full_lane_rejects_at_once_with_retry_after():
+    lane = Lane('test', workers=1, max_queue=0)
+    release = threading.Event()
+    lane.submit(release.wait, 5)
+
+    with pytest.raises(LaneFull) as error:
+        lane.submit(lambda: None)
+
+    assert error.value.lane == 'test'
+    assert error.value.retry_after >= 1
+    release.set()
+    lane.shutdown()
+
+
+def test_failed_tasks_free_their_place():
+    lane = Lane('test', workers=1, max_queue=0)
+
+    def fail():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        lane.submit(fail).result(5)
+    assert lane.submit(lambda: 1).result(5) == 1
+    lane.shutdown()
+
+
+def test_check_request_threads_keeps_threads_for_light_requests():
+    heavy = lanes['heavy']
+    needed = heavy.workers + heavy.max_queue
+
+    check_request_threads(needed + 2, 2)
+    with pytest.raises(ValueError):
+        check_request_threads(needed + 1, 2)
+
+
+def test_default_config_passes_the_thread_check():
+    check_request_threads(Config.WEB_THREADS, Config.WEB_RESERVED_THREADS)
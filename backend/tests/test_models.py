@@ -0,0 +1,76 @@
+from models import LearningPlan, Resource, Step
+
+PLAN = {
+    'id': 'abc',
+    'goal': 'I want to learn piano to play songs',
+    'skill': 'piano',
+    'timeline': {
+        'estimated_weeks': 8,
+        'start_date': '2024-01-01',
+        'end_date': '2024-02-26',
+        'milestones': [{
+            'id': 'milestone-1', 'name': 'Basics', 'description': 'Learn the basics',
+            'duration_weeks': 8, 'start_week': 1, 'end_week': 8
+        }]
+    },
+    'steps': [{
+        'id': 'step-1',
+        'title': 'Learn scales',
+        'description': 'Practice major scales',
+        'time_estimate': '1 week',
+        'difficulty': 'Easy',
+        'resources': [
+            {'title': 'Scales', 'url': 'https://example.org/scales', 'type': 'article', 'description': 'Intro'},
+            {'title': 'Video', 'url': 'https://example.org/v', 'type': 'video', 'thumbnail': 'https://example.org/t.jpg'}
+        ],
+        'expected_outcome': 'Play C major',
+        'milestone_id': 'milestone-1'
+    }],
+    'created_at': '2024-01-01T00:00:00',
+    'updated_at': '2024-01-02T00:00:00',
+    'degraded': 'latency'
+}
+
+
+def test_plan_round_trips_through_dict_and_json():
+    plan = LearningPlan.from_dict(PLAN)
+
+    assert plan.to_dict() == PLAN
+    assert LearningPlan.from_json(plan.to_json()) == plan
+
+
+def test_optional_fields_are_left_out_when_unset():
+    data = dict(PLAN)
+    del data['id'], data['degraded']
+
+    plan = LearningPlan.from_dict(data).to_dict()
+
+    assert 'id' not in plan and 'degraded' not in plan and 'error' not in plan
+
+
+def test_from_dict_coerces_values_and_fills_defaults():
+    plan = LearningPlan.from_dict({
+        'goal': None,
+        'skill': 42,
+        'timeline': 'not a dict',
+        'steps': [{'title': 'A', 'resources': [{'url': 'https://example.org'}, 'junk']}, 'junk']
+    })
+
+    assert plan.goal == '' and plan.skill == '42'
+    assert plan.timeline.milestones == []
+    assert len(plan.steps) == 1
+    assert plan.steps[0].resources == [Resource(title='', url='https://example.org', type='article')]
+    assert plan.updated_at == plan.created_at
+
+
+def test_step_marks_completed_only_when_true():
+    step = Step.from_dict({'title': 'A', 'completed': True})
+
+    assert step.to_dict()['completed'] is True
+    assert 'completed' not in Step.from_dict({'title': 'A'}).to_dict()
+
+
+def test_models_are_slotted():
+    step = Step.from_dict({'title': 'A'})
+
+    assert not hasattr(step, '__dict__')
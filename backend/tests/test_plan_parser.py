@@ -0,0 +1,56 @@
+from plan_parser import extract_plan, iter_json_candidates, outline_lines
+
+
+def test_extracts_plan_from_markdown_fence_with_prose():
+    text = 'Here is your plan:\n```json\n{"goal": "g", "steps": [{"title": "A"}, {"title": "B"}]}\n```\nGood luck!'
+
+    plan = extract_plan(text)
+
+    assert plan['goal'] == 'g'
+    assert [s['title'] for s in plan['steps']] == ['A', 'B']
+
+
+def test_drops_trailing_commas():
+    plan = extract_plan('{"steps": [{"title": "A",}, {"title": "B"},],}')
+
+    assert [s['title'] for s in plan['steps']] == ['A', 'B']
+
+
+def test_recovers_truncated_output_up_to_the_last_complete_step():
+    plan = extract_plan('{"steps": [{"title": "A", "description": "x"}, {"title": "B", "descr')
+
+    assert [s['title'] for s in plan['steps']] == ['A']
+
+
+def test_tolerates_unescaped_control_characters_in_strings():
+    plan = extract_plan('{"steps": [{"title": "A", "description": "line one\nline two"}]}')
+
+    assert plan['steps'][0]['description'] == 'line one\nline two'
+
+
+def test_picks_the_candidate_with_the_most_titled_steps_and_drops_untitled_ones():
+    text = '{"steps": [{"title": "only"}]} and {"plan": {"steps": [{"title": "A"}, {"title": "B"}, {"x": 1}]}}'
+
+    plan = extract_plan(text)
+
+    assert [s['title'] for s in plan['steps']] == ['A', 'B']
+
+
+def test_accepts_a_bare_list_of_steps():
+    assert extract_plan('[{"title": "A"}, {"title": "B"}]') == {'steps': [{'title': 'A'}, {'title': 'B'}]}
+
+
+def test_returns_none_without_steps():
+    assert extract_plan('no json here') is None
+    assert extract_plan('{"steps": []}') is None
+    assert extract_plan(None) is None
+
+
+def test_mismatched_closers_close_the_brackets_they_skip():
+    assert list(iter_json_candidates('{"a": [1, 2}')) == ['{"a":[1,2]}']
+
+
+def test_outline_lines_prefers_numbered_steps_then_bullets():
+    assert outline_lines("# Plan\nStep 1: Learn scales\nStep 2: Play songs\n- ignored") == ['Learn scales', 'Play songs']
+    assert outline_lines("Intro\n- Learn scales\n* Play songs") == ['Learn scales', 'Play songs']
+    assert outline_lines("a\nb\nc", limit=2) == ['a', 'b']
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from serp_gateway import DailyQuota, TokenBucket
+
+
+def test_token_bucket_allows_a_burst_then_refuses_without_waiting():
+    bucket = TokenBucket(rate=0.001, burst=2)
+
+    assert asyncio.run(bucket.acquire_async()) is True
+    assert asyncio.run(bucket.acquire_async()) is True
+    assert asyncio.run(bucket.acquire_async()) is False
+    assert bucket.tokens() < 1
+
+
+def test_token_bucket_waits_for_a_refill_within_the_timeout():
+    bucket = TokenBucket(rate=50, burst=1)
+    asyncio.run(bucket.acquire_async())
+
+    assert asyncio.run(bucket.acquire_async(timeout=1)) is True
+
+
+def test_token_bucket_gives_up_when_the_refill_is_past_the_timeout():
+    bucket = TokenBucket(rate=0.5, burst=1)
+    asyncio.run(bucket.acquire_async())
+
+    assert asyncio.run(bucket.acquire_async(timeout=0.05)) is False
+
+
+def test_token_bucket_without_a_rate_never_refills():
+    bucket = TokenBucket(rate=0, burst=1)
+
+    assert asyncio.run(bucket.acquire_async()) is True
+    assert asyncio.run(bucket.acquire_async(timeout=0.05)) is False
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def quota(request, tmp_path):
+    path = str(tmp_path / 'usage.sqlite3') if request.param == 'sqlite' else None
+    return DailyQuota(limit=2, path=path)
+
+
+def test_daily_quota_stops_at_the_limit(quota):
+    assert quota.consume() is True
+    assert quota.consume() is True
+    assert quota.consume() is False
+    assert quota.used() == 2
+
+
+def test_daily_quota_is_shared_through_sqlite(tmp_path):
+    path = str(tmp_path / 'usage.sqlite3')
+    DailyQuota(limit=2, path=path).consume()
+
+    other = DailyQuota(limit=2, path=path)
+    assert other.used() == 1
+    assert other.consume() is True
+    assert other.consume() is False
+
+
+def test_daily_quota_resets_on_a_new_day(quota, monkeypatch):
+    quota.consume()
+    quota.consume()
+
+    monkeypatch.setattr(DailyQuota, '_today', staticmethod(lambda: '2999-01-01'))
+    assert quota.used() == 0
+    assert quota.consume() is True
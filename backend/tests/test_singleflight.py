@@ -0,0 +1,75 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_calls_with_the_same_key_share_one_execution():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'plan'
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(flight.do, 'key', work)
+        started.wait(5)
+        followers = [executor.submit(flight.do, 'key', work) for _ in range(3)]
+        # Followers are counted as coalesced before they start waiting
+        while flight.stats()['coalesced'] < 3:
+            time.sleep(0.01)
+        release.set()
+
+        assert leader.result() == ('plan', False)
+        assert [f.result() for f in followers] == [('plan', True)] * 3
+
+    assert len(calls) == 1
+    assert flight.stats() == {'executions': 1, 'coalesced': 3, 'in_flight': 0}
+
+
+def test_followers_receive_the_leaders_exception():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError('boom')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, 'key', fail)
+        started.wait(5)
+        follower = executor.submit(flight.do, 'key', fail)
+        while flight.stats()['coalesced'] < 1:
+            time.sleep(0.01)
+        release.set()
+
+        with pytest.raises(ValueError):
+            leader.result()
+        with pytest.raises(ValueError):
+            follower.result()
+
+
+def test_sequential_calls_run_again():
+    flight = SingleFlight()
+
+    assert flight.do('key', lambda: 1) == (1, False)
+    assert flight.do('key', lambda: 2) == (2, False)
+    assert flight.stats()['executions'] == 2
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight()
+
+    assert flight.do('a', lambda x: x, 'a') == ('a', False)
+    assert flight.do('b', lambda x: x, x='b') == ('b', False)
+    assert flight.stats()['coalesced'] == 0
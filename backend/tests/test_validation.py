@@ -0,0 +1,62 @@
+import pytest
+
+from validation import ValidationError, input_schema, parse_plan_request
+
+BODY = {
+    'goalReason': 'play songs',
+    'skill': ' Piano ',
+    'currentLevel': 'none',
+    'targetLevel': 'ADVANCED',
+    'commitment': 'moderate'
+}
+
+
+def test_parse_plan_request_normalizes_into_engine_arguments():
+    assert parse_plan_request(BODY) == {
+        'goal': 'I want to learn Piano to play songs',
+        'skill': 'Piano',
+        'skill_level': {'current': 'None', 'target': 'Advanced'},
+        'commitment_level': 'Moderate'
+    }
+
+
+def test_parse_plan_request_allows_an_empty_goal():
+    formatted_input = parse_plan_request(dict(BODY, goalReason=''))
+
+    assert formatted_input['skill'] == 'Piano'
+    assert formatted_input['goal'].startswith('I want to learn Piano')
+
+
+@pytest.mark.parametrize('data', [None, [], 'text'])
+def test_parse_plan_request_rejects_non_objects(data):
+    with pytest.raises(ValidationError) as error:
+        parse_plan_request(data)
+
+    assert error.value.errors == [{'field': None, 'code': 'type', 'message': 'Request body must be a JSON object'}]
+
+
+def test_parse_plan_request_reports_every_error():
+    with pytest.raises(ValidationError) as error:
+        parse_plan_request({'skill': 3, 'currentLevel': 'Guru', 'targetLevel': 'Beginner'})
+
+    codes = {(e['field'], e['code']) for e in error.value.errors}
+    assert codes == {('skill', 'type'), ('currentLevel', 'enum'), ('commitment', 'required')}
+
+
+def test_target_level_must_be_above_current_level():
+    with pytest.raises(ValidationError) as error:
+        parse_plan_request(dict(BODY, currentLevel='Advanced', targetLevel='Beginner'))
+
+    assert [e['code'] for e in error.value.errors] == ['order']
+
+
+def test_input_schema_requires_the_goal():
+    data = dict(BODY)
+    data['goal'] = data.pop('goalReason')
+
+    values, errors = input_schema.validate(data)
+    assert errors == []
+    assert values['goal'] == 'play songs'
+
+    _, errors = input_schema.validate(dict(data, goal='  '))
+    assert errors == [{'field': 'goal', 'code': 'required', 'message': 'Goal is required'}]
@@ -0,0 +1,169 @@
+import asyncio
+import functools
+import inspect
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from cache import CacheStats, MemoryCache, SQLiteCache, TieredCache, make_key
+from config import Config
+import metrics
+
+
+def build_backend(kind: str, table: str, ttl: float, max_size: Optional[int] = None) -> Optional[Any]:
+    """
+    Create a cache backend for tool results
+
+    Args:
+        kind: 'memory' (in-process LRU), 'sqlite' (on-disk, shared between processes),
+            'tiered' (both) or 'none'
+        table: SQLite table for the on-disk store
+        ttl: Default TTL in seconds
+        max_size: Entries kept in memory (defaults to Config.TOOL_CACHE_SIZE)
+
+    Returns:
+        A cache with get/set, or None when caching is disabled
+    """
+    if kind == 'none':
+        return None
+    if max_size is None:
+        max_size = Config.TOOL_CACHE_SIZE
+    if kind == 'memory':
+        return MemoryCache(max_size=max_size, ttl=ttl)
+    if kind == 'sqlite':
+        return SQLiteCache(Config.CACHE_DB_PATH, table=table, ttl=ttl)
+    if kind == 'tiered':
+        return TieredCache(
+            MemoryCache(max_size=max_size, ttl=ttl),
+            SQLiteCache(Config.CACHE_DB_PATH, table=table, ttl=ttl)
+        )
+    raise ValueError(f"Unknown tool cache backend: {kind}")
+
+
+class Fallback(list):
+    """
+    Results a tool returns from a fallback source instead of its own upstream
+
+    They are cached only for the negative TTL, so the real upstream is tried
+    again soon.
+    """
+
+
+# Per-tool hit/miss counters, keyed by tool name
+tool_stats: Dict[str, CacheStats] = {}
+
+
+def cached_tool(
+    name: str,
+    ttl: float,
+    negative_ttl: Optional[float] = None,
+    backend: Optional[Any] = None
+) -> Callable[[Callable[..., List[Any]]], Callable[..., List[Any]]]:
+    """
+    Cache a search tool's results on its normalized query and max_results
+
+    The wrapped function should raise on failure. Errors are logged and turned into
+    an empty result that is not cached, while a genuinely empty result is cached for
+    negative_ttl so that hopeless queries don't hit the upstream over and over.
+    Fallback results are cached for negative_ttl too. Coroutine functions get an
+    async wrapper with the same caching.
+
+    Args:
+        name: Tool name, used in cache keys and counters
+        ttl: Seconds a non-empty result stays cached
+        negative_ttl: Seconds an empty result stays cached (defaults to Config.TOOL_CACHE_NEGATIVE_TTL)
+        backend: Cache to use (defaults to one built from Config.TOOL_CACHE_BACKEND)
+    """
+    if negative_ttl is None:
+        negative_ttl = Config.TOOL_CACHE_NEGATIVE_TTL
+    if backend is None:
+        backend = build_backend(Config.TOOL_CACHE_BACKEND, f"tool_cache_{name}", ttl)
+    stats = tool_stats.setdefault(name, CacheStats())
+
+    def decorator(fn: Callable[..., List[Any]]) -> Callable[..., List[Any]]:
+        signature = inspect.signature(fn)
+
+        def bind(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return bound, make_key(name, bound.arguments['query'], bound.arguments.get('max_results'))
+
+        def cached_result(key: str) -> Optional[List[Any]]:
+            if backend is not None:
+                cached = backend.get(key)
+                if cached is not None:
+                    stats.record(hits=1)
+                    metrics.tool_calls.inc(tool=name, outcome='hit')
+                    if not cached:
+                        metrics.tool_empty_results.inc(tool=name)
+                    return cached
+            stats.record(misses=1)
+            return None
+
+        def failed(error: Exception, start: float) -> List[Any]:
+            print(f"{name} error: {str(error)}")
+            metrics.tool_calls.inc(tool=name, outcome='error')
+            metrics.tool_duration.observe(time.perf_counter() - start, tool=name)
+            # Return an empty list - the agent should handle this appropriately
+            return []
+
+        def record(result: List[Any], start: float):
+            metrics.tool_calls.inc(tool=name, outcome='fallback' if isinstance(result, Fallback) else 'miss')
+            metrics.tool_duration.observe(time.perf_counter() - start, tool=name)
+            if not result:
+                metrics.tool_empty_results.inc(tool=name)
+
+        def save(key: str, result: List[Any]):
+            if backend is not None:
+                fallback = isinstance(result, Fallback)
+                backend.set(key, result, ttl if result and not fallback else negative_ttl)
+
+        if inspect.iscoroutinefunction(fn):
+            # SQLite reads and writes (which may wait on a lock) run on the default
+            # executor so they never block the event loop
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                loop = asyncio.get_running_loop()
+                bound, key = bind(args, kwargs)
+                cached = await loop.run_in_executor(None, cached_result, key)
+                if cached is not None:
+                    return cached
+                start = time.perf_counter()
+                try:
+                    result = await fn(*bound.args, **bound.kwargs)
+                except Exception as e:
+                    return failed(e, start)
+                record(result, start)
+                await loop.run_in_executor(None, save, key, result)
+                return result
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                bound, key = bind(args, kwargs)
+                cached = cached_result(key)
+                if cached is not None:
+                    return cached
+                start = time.perf_counter()
+                try:
+                    result = fn(*bound.args, **bound.kwargs)
+                except Exception as e:
+                    return failed(e, start)
+                record(result, start)
+                save(key, result)
+                return result
+
+        def lookup(*args, **kwargs) -> Optional[List[Any]]:
+            """Return the cached result for these arguments, or None, without calling the upstream"""
+            if backend is None:
+                return None
+            return backend.get(bind(args, kwargs)[1])
+
+        wrapper.cache = backend
+        wrapper.lookup = lookup
+        return wrapper
+
+    return decorator
+
+
+def tool_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit-rate counters for every cached tool"""
+    return {name: stats.snapshot() for name, stats in tool_stats.items()}
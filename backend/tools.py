@@ -1,23 +1,24 @@
+import asyncio
 import json
 import os
-import requests
-import wikipediaapi
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
-from serpapi import GoogleSearch
 
-# Initialize APIs
-wiki = wikipediaapi.Wikipedia(
-    language='en',
-    extract_format=wikipediaapi.ExtractFormat.WIKI,
-    user_agent='skill-roadmap-app/1.0 (contact@example.com)'
-)
+import mediawiki
+from config import Config
+from event_loop import synchronous
+from http_client import async_session
+from serp_gateway import SerpBudgetError, fallback_results_async, serp_gateway
+from tool_cache import Fallback, cached_tool
 
-# Initialize SerpAPI
-serp_api_key = os.getenv('SERP_API_KEY')
 youtube_api_key = os.getenv('YOUTUBE_API_KEY')
 
-def search_wikipedia(query: str, max_results: int = 3) -> List[Dict[str, str]]:
+# The search tools are coroutines so that an agent can wait on many of them
+# without holding a thread each; search_wikipedia, search_web and search_youtube
+# are blocking versions of them
+
+@cached_tool('search_wikipedia', ttl=Config.WIKIPEDIA_CACHE_TTL)
+async def search_wikipedia_async(query: str, max_results: int = 3) -> List[Dict[str, str]]:
     """
     Search Wikipedia for information related to a learning topic
     
@@ -28,53 +29,42 @@ def search_wikipedia(query: str, max_results: int = 3) -> List[Dict[str, str]]:
     Returns:
         List of dictionaries with title, summary, and URL
     """
+    def truncate(page):
+        summary = page['summary']
+        return {**page, 'summary': summary[:500] + "..." if len(summary) > 500 else summary}
+    
+    # Look up the page and its first few links at the same time; the
+    # "{query} learning" fallback rides along in the same batched request
+    fallback_title = f"{query} learning"
+    links_task = asyncio.ensure_future(mediawiki.fetch_link_summaries_async(query, max_results - 1))
     try:
-        # The wikipediaapi package doesn't actually have an opensearch method
-        # Let's use a direct approach instead
-        
-        # First, try to get a page directly with the query
-        page = wiki.page(query)
-        results = []
-        
-        if page.exists():
-            results.append({
-                'title': page.title,
-                'summary': page.summary[:500] + "..." if len(page.summary) > 500 else page.summary,
-                'url': page.fullurl
-            })
-            
-            # Try to get some related pages via links
-            # Get the first few links from the page
-            links = list(page.links.values())[:max_results-1]
-            for link_page in links:
-                if link_page.exists():
-                    results.append({
-                        'title': link_page.title,
-                        'summary': link_page.summary[:500] + "..." if len(link_page.summary) > 500 else link_page.summary,
-                        'url': link_page.fullurl
-                    })
-        
-        # If no results found, return empty list
-        if not results:
-            # Try alternative search by adding "learning" to the query
-            alt_page = wiki.page(f"{query} learning")
-            if alt_page.exists():
-                results.append({
-                    'title': alt_page.title,
-                    'summary': alt_page.summary[:500] + "..." if len(alt_page.summary) > 500 else alt_page.summary,
-                    'url': alt_page.fullurl
-                })
-                
-        return results
-    except Exception as e:
-        print(f"Wikipedia search error: {str(e)}")
-        # Return an empty list - the agent should handle this appropriately
-        return []
+        pages = await mediawiki.fetch_summaries_async([query, fallback_title])
+    except BaseException:
+        links_task.cancel()
+        raise
+    
+    results = []
+    if query in pages:
+        results.append(truncate(pages[query]))
+        results.extend(truncate(page) for page in await links_task)
+    else:
+        links_task.cancel()
+        if fallback_title in pages:
+            results.append(truncate(pages[fallback_title]))
+    
+    return results[:max_results]
+
+search_wikipedia = synchronous(search_wikipedia_async)
 
-def search_web(query: str, max_results: int = 5) -> List[Dict[str, str]]:
+@cached_tool('search_web', ttl=Config.WEB_CACHE_TTL)
+async def search_web_async(query: str, max_results: int = 5) -> List[Dict[str, str]]:
     """
     Search the web using SerpAPI for learning resources
     
+    Searches go through the SerpAPI gateway; once its rate limit or daily budget
+    is reached, the configured fallback results are returned instead and only
+    cached briefly.
+    
     Args:
         query: Search query
         max_results: Maximum number of results to return
@@ -83,34 +73,26 @@ def search_web(query: str, max_results: int = 5) -> List[Dict[str, str]]:
         List of dictionaries with title, snippet, and URL
     """
     try:
-        if not serp_api_key:
-            raise ValueError("SERP API key is not set")
-            
-        search_params = {
-            "q": query,
-            "api_key": serp_api_key,
-            "num": max_results
+        results = await serp_gateway.search_async(query, max_results)
+    except SerpBudgetError as e:
+        print(f"search_web degraded ({e.reason}): {str(e)}")
+        results = Fallback(await fallback_results_async(query, max_results))
+    
+    organic_results = [
+        {
+            'title': result['title'],
+            'snippet': result['snippet'],
+            'link': result['link']
         }
-        
-        search = GoogleSearch(search_params)
-        results = search.get_dict()
-        
-        organic_results = []
-        if 'organic_results' in results:
-            for result in results['organic_results'][:max_results]:
-                organic_results.append({
-                    'title': result.get('title', ''),
-                    'snippet': result.get('snippet', ''),
-                    'link': result.get('link', '')
-                })
-        
-        return organic_results
-    except Exception as e:
-        print(f"SERP search error: {str(e)}")
-        # Return an empty list - the agent should handle this appropriately
-        return []
+        for result in results[:max_results]
+    ]
+    
+    return Fallback(organic_results) if isinstance(results, Fallback) else organic_results
+
+search_web = synchronous(search_web_async)
 
-def search_youtube(query: str, max_results: int = 3) -> List[Dict[str, str]]:
+@cached_tool('search_youtube', ttl=Config.YOUTUBE_CACHE_TTL)
+async def search_youtube_async(query: str, max_results: int = 3) -> List[Dict[str, str]]:
     """
     Search YouTube for educational videos related to a topic
     
@@ -121,42 +103,41 @@ def search_youtube(query: str, max_results: int = 3) -> List[Dict[str, str]]:
     Returns:
         List of dictionaries with title, description, URL, and thumbnail
     """
-    try:
-        if not youtube_api_key:
-            raise ValueError("YouTube API key is not set")
-            
-        # YouTube Data API v3 endpoint
-        url = f"https://www.googleapis.com/youtube/v3/search"
-        
-        params = {
-            'part': 'snippet',
-            'q': query + " tutorial",
-            'type': 'video',
-            'maxResults': max_results,
-            'key': youtube_api_key,
-            'relevanceLanguage': 'en',
-            'videoEmbeddable': 'true'
-        }
-        
-        response = requests.get(url, params=params)
-        results = response.json()
-        
-        videos = []
-        if 'items' in results:
-            for item in results['items']:
-                video_id = item['id']['videoId']
-                videos.append({
-                    'title': item['snippet']['title'],
-                    'description': item['snippet']['description'],
-                    'url': f"https://www.youtube.com/watch?v={video_id}",
-                    'thumbnail': item['snippet']['thumbnails']['medium']['url']
-                })
+    if not youtube_api_key:
+        raise ValueError("YouTube API key is not set")
         
-        return videos
-    except Exception as e:
-        print(f"YouTube search error: {str(e)}")
-        # Return an empty list - the agent should handle this appropriately
-        return []
+    # YouTube Data API v3 endpoint
+    url = Config.YOUTUBE_API_URL
+    
+    params = {
+        'part': 'snippet',
+        'q': query + " tutorial",
+        'type': 'video',
+        'maxResults': max_results,
+        'key': youtube_api_key,
+        'relevanceLanguage': 'en',
+        'videoEmbeddable': 'true'
+    }
+    
+    response = await async_session().get(url, params=params)
+    # Quota and key errors must not be cached as "no videos"
+    response.raise_for_status()
+    results = response.json()
+    
+    videos = []
+    if 'items' in results:
+        for item in results['items']:
+            video_id = item['id']['videoId']
+            videos.append({
+                'title': item['snippet']['title'],
+                'description': item['snippet']['description'],
+                'url': f"https://www.youtube.com/watch?v={video_id}",
+                'thumbnail': item['snippet']['thumbnails']['medium']['url']
+            })
+    
+    return videos
+
+search_youtube = synchronous(search_youtube_async)
 
 def generate_timeline(
     skill_level: Dict[str, str],
@@ -252,6 +233,153 @@ def generate_timeline(
         "milestones": milestones
     }
 
+async def generate_timeline_async(
+    skill_level: Dict[str, str],
+    commitment_level: str
+) -> Dict[str, Any]:
+    """
+    Generate a realistic timeline based on skill levels and commitment
+    
+    Same as generate_timeline, which does no I/O, for agents calling tools asynchronously
+    """
+    return generate_timeline(skill_level, commitment_level)
+
+# Curated steps used to pad short plans and by the fast-path engine, ordered from
+# first steps to more advanced ones; {skill} is filled in per plan
+STEP_TEMPLATES = {
+    'music': [
+        {
+            "title": "Learn basic {skill} theory",
+            "description": "Understand the fundamental music theory concepts related to {skill}. This includes notes, scales, and basic chord progressions.",
+            "expected_outcome": "Ability to read basic sheet music and understand foundational {skill} theory"
+        },
+        {
+            "title": "Master proper technique and posture",
+            "description": "Learn the correct posture and hand/body positioning for {skill}. Good technique is essential for preventing injuries and developing good habits.",
+            "expected_outcome": "Proper form and technique when playing/practicing {skill}"
+        },
+        {
+            "title": "Practice rhythm and timing exercises",
+            "description": "Develop a strong sense of rhythm through dedicated timing exercises. Start with a metronome at slow tempos and gradually increase speed.",
+            "expected_outcome": "Improved timing and rhythm skills on {skill}"
+        },
+        {
+            "title": "Learn to play simple songs",
+            "description": "Apply your skills by learning to play simple, popular songs on the {skill}. This helps build confidence and makes practice more enjoyable.",
+            "expected_outcome": "Ability to play 3-5 simple songs on {skill}"
+        },
+        {
+            "title": "Record and analyze your playing",
+            "description": "Record yourself playing and critically analyze your performance. Identify areas for improvement and focus on specific techniques that need work.",
+            "expected_outcome": "Self-awareness of strengths and weaknesses in {skill} playing"
+        }
+    ],
+    'programming': [
+        {
+            "title": "Learn {skill} syntax and basic concepts",
+            "description": "Master the fundamental syntax and concepts of {skill}. This includes variables, control structures, and basic data types.",
+            "expected_outcome": "Understanding of basic {skill} syntax and concepts"
+        },
+        {
+            "title": "Build simple projects with {skill}",
+            "description": "Apply your knowledge by creating small projects. Start with guided tutorials and gradually increase complexity.",
+            "expected_outcome": "Completion of 2-3 small projects using {skill}"
+        },
+        {
+            "title": "Learn debugging techniques in {skill}",
+            "description": "Develop skills to identify and fix errors in your {skill} code. Learn to use debugging tools and read error messages effectively.",
+            "expected_outcome": "Ability to troubleshoot and resolve common errors in {skill}"
+        },
+        {
+            "title": "Study best practices and code standards",
+            "description": "Learn industry-standard practices for writing clean, maintainable {skill} code. Study code style guides and conventions.",
+            "expected_outcome": "Writing code that follows best practices in {skill}"
+        },
+        {
+            "title": "Contribute to open source {skill} projects",
+            "description": "Start contributing to open source projects that use {skill}. This provides real-world experience and feedback from other developers.",
+            "expected_outcome": "Successful contributions to at least one open source {skill} project"
+        }
+    ],
+    'language': [
+        {
+            "title": "Master basic {skill} vocabulary",
+            "description": "Learn essential vocabulary for everyday conversations in {skill}. Focus on high-frequency words and practical phrases.",
+            "expected_outcome": "Knowledge of 500-1000 common {skill} words"
+        },
+        {
+            "title": "Practice {skill} pronunciation",
+            "description": "Develop proper pronunciation skills in {skill}. Work with audio resources and practice speaking aloud regularly.",
+            "expected_outcome": "Clear, understandable pronunciation of basic {skill} words and phrases"
+        },
+        {
+            "title": "Study {skill} grammar fundamentals",
+            "description": "Learn the basic grammar rules of {skill}. Understand sentence structure, verb conjugations, and other important grammatical concepts.",
+            "expected_outcome": "Ability to form basic grammatically correct sentences in {skill}"
+        },
+        {
+            "title": "Engage in basic {skill} conversations",
+            "description": "Practice simple conversations in {skill} with language partners or tutors. Focus on everyday topics and practical situations.",
+            "expected_outcome": "Ability to hold a 5-minute basic conversation in {skill}"
+        },
+        {
+            "title": "Consume {skill} media",
+            "description": "Listen to and read simple content in {skill}. Start with content designed for learners and gradually progress to authentic materials.",
+            "expected_outcome": "Understanding of simple {skill} content without heavy reliance on translation"
+        }
+    ],
+    'generic': [
+        {
+            "title": "Learn {skill} fundamentals",
+            "description": "Master the basic concepts and foundational knowledge of {skill}. This builds the groundwork for more advanced learning.",
+            "expected_outcome": "Solid understanding of {skill} basics"
+        },
+        {
+            "title": "Practice basic {skill} techniques",
+            "description": "Develop proficiency in the fundamental techniques of {skill} through regular, focused practice sessions.",
+            "expected_outcome": "Competence in basic {skill} techniques"
+        },
+        {
+            "title": "Apply {skill} in simple projects",
+            "description": "Use your developing {skill} knowledge in small projects or exercises. This helps reinforce learning through practical application.",
+            "expected_outcome": "Completion of 2-3 simple {skill} projects"
+        },
+        {
+            "title": "Study advanced {skill} concepts",
+            "description": "Expand your knowledge by learning more complex aspects of {skill}. Build upon your foundational understanding.",
+            "expected_outcome": "Understanding of intermediate {skill} concepts"
+        },
+        {
+            "title": "Join a {skill} community",
+            "description": "Connect with others who are learning or practicing {skill}. Share experiences, ask questions, and learn from others.",
+            "expected_outcome": "Active participation in a {skill} community"
+        }
+    ]
+}
+
+# Skills with their own set of step templates (everything else is 'generic')
+TEMPLATE_CATEGORIES = {
+    **{skill: 'music' for skill in ['piano', 'guitar', 'violin', 'drums', 'singing']},
+    **{skill: 'programming' for skill in ['programming', 'coding', 'python', 'javascript', 'java', 'web development']},
+    **{skill: 'language' for skill in ['language', 'spanish', 'french', 'german', 'japanese', 'chinese', 'english']}
+}
+
+def step_templates(skill: str) -> List[Dict[str, str]]:
+    """
+    Return the step templates for a skill, with the skill filled in
+    
+    Args:
+        skill: The skill to be learned
+        
+    Returns:
+        List of step templates with 'title', 'description' and 'expected_outcome'
+    """
+    category = TEMPLATE_CATEGORIES.get(skill.lower(), 'generic')
+    return [
+        {field: text.format(skill=skill) for field, text in template.items()}
+        for template in STEP_TEMPLATES[category]
+    ]
+
 def format_learning_plan(
     goal: str,
     skill: str,
@@ -310,122 +438,7 @@ def format_learning_plan(
         print(f"Warning: Only {len(steps)} steps provided. Adding more to meet minimum of {MIN_REQUIRED_STEPS}.")
         
         # Template steps based on the skill
-        if skill.lower() in ['piano', 'guitar', 'violin', 'drums', 'singing']:
-            # Music-related templates
-            templates = [
-                {
-                    "title": f"Learn basic {skill} theory",
-                    "description": f"Understand the fundamental music theory concepts related to {skill}. This includes notes, scales, and basic chord progressions.",
-                    "expected_outcome": f"Ability to read basic sheet music and understand foundational {skill} theory"
-                },
-                {
-                    "title": f"Master proper technique and posture",
-                    "description": f"Learn the correct posture and hand/body positioning for {skill}. Good technique is essential for preventing injuries and developing good habits.",
-                    "expected_outcome": f"Proper form and technique when playing/practicing {skill}"
-                },
-                {
-                    "title": f"Practice rhythm and timing exercises",
-                    "description": f"Develop a strong sense of rhythm through dedicated timing exercises. Start with a metronome at slow tempos and gradually increase speed.",
-                    "expected_outcome": f"Improved timing and rhythm skills on {skill}"
-                },
-                {
-                    "title": f"Learn to play simple songs",
-                    "description": f"Apply your skills by learning to play simple, popular songs on the {skill}. This helps build confidence and makes practice more enjoyable.",
-                    "expected_outcome": f"Ability to play 3-5 simple songs on {skill}"
-                },
-                {
-                    "title": f"Record and analyze your playing",
-                    "description": f"Record yourself playing and critically analyze your performance. Identify areas for improvement and focus on specific techniques that need work.",
-                    "expected_outcome": f"Self-awareness of strengths and weaknesses in {skill} playing"
-                }
-            ]
-        elif skill.lower() in ['programming', 'coding', 'python', 'javascript', 'java', 'web development']:
-            # Programming-related templates
-            templates = [
-                {
-                    "title": f"Learn {skill} syntax and basic concepts",
-                    "description": f"Master the fundamental syntax and concepts of {skill}. This includes variables, control structures, and basic data types.",
-                    "expected_outcome": f"Understanding of basic {skill} syntax and concepts"
-                },
-                {
-                    "title": f"Build simple projects with {skill}",
-                    "description": f"Apply your knowledge by creating small projects. Start with guided tutorials and gradually increase complexity.",
-                    "expected_outcome": f"Completion of 2-3 small projects using {skill}"
-                },
-                {
-                    "title": f"Learn debugging techniques in {skill}",
-                    "description": f"Develop skills to identify and fix errors in your {skill} code. Learn to use debugging tools and read error messages effectively.",
-                    "expected_outcome": f"Ability to troubleshoot and resolve common errors in {skill}"
-                },
-                {
-                    "title": f"Study best practices and code standards",
-                    "description": f"Learn industry-standard practices for writing clean, maintainable {skill} code. Study code style guides and conventions.",
-                    "expected_outcome": f"Writing code that follows best practices in {skill}"
-                },
-                {
-                    "title": f"Contribute to open source {skill} projects",
-                    "description": f"Start contributing to open source projects that use {skill}. This provides real-world experience and feedback from other developers.",
-                    "expected_outcome": f"Successful contributions to at least one open source {skill} project"
-                }
-            ]
-        elif skill.lower() in ['language', 'spanish', 'french', 'german', 'japanese', 'chinese', 'english']:
-            # Language learning templates
-            templates = [
-                {
-                    "title": f"Master basic {skill} vocabulary",
-                    "description": f"Learn essential vocabulary for everyday conversations in {skill}. Focus on high-frequency words and practical phrases.",
-                    "expected_outcome": f"Knowledge of 500-1000 common {skill} words"
-                },
-                {
-                    "title": f"Practice {skill} pronunciation",
-                    "description": f"Develop proper pronunciation skills in {skill}. Work with audio resources and practice speaking aloud regularly.",
-                    "expected_outcome": f"Clear, understandable pronunciation of basic {skill} words and phrases"
-                },
-                {
-                    "title": f"Study {skill} grammar fundamentals",
-                    "description": f"Learn the basic grammar rules of {skill}. Understand sentence structure, verb conjugations, and other important grammatical concepts.",
-                    "expected_outcome": f"Ability to form basic grammatically correct sentences in {skill}"
-                },
-                {
-                    "title": f"Engage in basic {skill} conversations",
-                    "description": f"Practice simple conversations in {skill} with language partners or tutors. Focus on everyday topics and practical situations.",
-                    "expected_outcome": f"Ability to hold a 5-minute basic conversation in {skill}"
-                },
-                {
-                    "title": f"Consume {skill} media",
-                    "description": f"Listen to and read simple content in {skill}. Start with content designed for learners and gradually progress to authentic materials.",
-                    "expected_outcome": f"Understanding of simple {skill} content without heavy reliance on translation"
-                }
-            ]
-        else:
-            # Generic templates for any skill
-            templates = [
-                {
-                    "title": f"Learn {skill} fundamentals",
-                    "description": f"Master the basic concepts and foundational knowledge of {skill}. This builds the groundwork for more advanced learning.",
-                    "expected_outcome": f"Solid understanding of {skill} basics"
-                },
-                {
-                    "title": f"Practice basic {skill} techniques",
-                    "description": f"Develop proficiency in the fundamental techniques of {skill} through regular, focused practice sessions.",
-                    "expected_outcome": f"Competence in basic {skill} techniques"
-                },
-                {
-                    "title": f"Apply {skill} in simple projects",
-                    "description": f"Use your developing {skill} knowledge in small projects or exercises. This helps reinforce learning through practical application.",
-                    "expected_outcome": f"Completion of 2-3 simple {skill} projects"
-                },
-                {
-                    "title": f"Study advanced {skill} concepts",
-                    "description": f"Expand your knowledge by learning more complex aspects of {skill}. Build upon your foundational understanding.",
-                    "expected_outcome": f"Understanding of intermediate {skill} concepts"
-                },
-                {
-                    "title": f"Join a {skill} community",
-                    "description": f"Connect with others who are learning or practicing {skill}. Share experiences, ask questions, and learn from others.",
-                    "expected_outcome": f"Active participation in a {skill} community"
-                }
-            ]
+        templates = step_templates(skill)
         
         # Determine step difficulty progression
         difficulties = ["Easy", "Easy", "Medium", "Medium", "Hard"]
@@ -494,4 +507,17 @@ def format_learning_plan(
         "steps": steps
     }
     
-    return formatted_plan
\ No newline at end of file
+    return formatted_plan
+
+async def format_learning_plan_async(
+    goal: str,
+    skill: str,
+    timeline: Dict[str, Any],
+    steps: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Format the complete learning plan response
+    
+    Same as format_learning_plan, which does no I/O, for agents calling tools asynchronously
+    """
+    return format_learning_plan(goal, skill, timeline, steps)
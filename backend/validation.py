@@ -0,0 +1,159 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import Config
+from models import CREATE_PLAN_SCHEMA
+
+# Commitment values sent by the frontend, mapped to Config.VALID_COMMITMENT_LEVELS
+COMMITMENT_MAP = {
+    "casual": "No rush",
+    "dedicated": "Dedicated",
+    "intensive": "Intensive",
+    "moderate": "Moderate"
+}
+
+# Names used for fields in error messages
+FIELD_LABELS = {
+    'goal': 'Goal',
+    'skill': 'Skill',
+    'currentLevel': 'Current level',
+    'targetLevel': 'Target level',
+    'commitment': 'Commitment level'
+}
+
+JSON_TYPES = {
+    'string': str,
+    'integer': int,
+    'number': (int, float),
+    'boolean': bool,
+    'object': dict,
+    'array': list
+}
+
+
+def capitalize_level(level):
+    if not level:
+        return level
+    return level[0].upper() + level[1:].lower()
+
+
+def normalize_commitment(commitment: str) -> str:
+    return COMMITMENT_MAP.get(commitment.lower(), commitment)
+
+
+# Applied to a field's (stripped) value before it is checked against its enum
+NORMALIZERS: Dict[str, Callable[[str], str]] = {
+    'currentLevel': capitalize_level,
+    'targetLevel': capitalize_level,
+    'commitment': normalize_commitment
+}
+
+
+class ValidationError(ValueError):
+    """Raised with the structured list of everything wrong with a request"""
+
+    def __init__(self, errors: List[Dict[str, Any]]):
+        super().__init__('; '.join(error['message'] for error in errors))
+        self.errors = errors
+
+
+def _error(field: Optional[str], code: str, message: str) -> Dict[str, Any]:
+    return {'field': field, 'code': code, 'message': message}
+
+
+class CompiledSchema:
+    """
+    Request validator compiled once from a JSON schema
+
+    Each property becomes a precomputed check (where to read it, whether it is
+    required, its type, normalizer and enum as a frozenset), and skill levels are
+    ranked from Config.VALID_SKILL_LEVELS, so validating a request is a single pass
+    over its fields with constant-time lookups.
+
+    Args:
+        schema: JSON schema of an object with string properties
+        rename: Request keys to read for schema properties, e.g. {'goal': 'goalReason'}
+        optional: Properties that are not required here even if the schema requires them
+    """
+
+    def __init__(self, schema: Dict[str, Any], rename: Optional[Dict[str, str]] = None, optional: Tuple[str, ...] = ()):
+        rename = rename or {}
+        required = set(schema.get('required', ())) - set(optional)
+        self._checks = []
+        for name, spec in schema['properties'].items():
+            self._checks.append((
+                name,
+                rename.get(name, name),
+                name in required,
+                JSON_TYPES.get(spec.get('type'), object),
+                spec.get('type', 'value'),
+                NORMALIZERS.get(name),
+                frozenset(spec['enum']) if 'enum' in spec else None,
+                FIELD_LABELS.get(name, name)
+            ))
+        self._level_rank = {level: rank for rank, level in enumerate(Config.VALID_SKILL_LEVELS)}
+
+    def validate(self, data: Any) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Normalize and check a request body
+
+        Returns:
+            The normalized values by schema property name, and a list of errors
+            (each with 'field', 'code' and 'message'), empty if the body is valid
+        """
+        if not isinstance(data, dict):
+            return {}, [_error(None, 'type', 'Request body must be a JSON object')]
+
+        values, errors = {}, []
+        for name, key, required, expected_type, type_name, normalize, allowed, label in self._checks:
+            value = data.get(key)
+            if isinstance(value, str):
+                value = value.strip()
+            if value is None or value == '':
+                if required:
+                    errors.append(_error(key, 'required', f"{label} is required"))
+                else:
+                    values[name] = value if value is not None else ''
+                continue
+            if not isinstance(value, expected_type):
+                errors.append(_error(key, 'type', f"{label} must be a {type_name}"))
+                continue
+            if normalize is not None:
+                value = normalize(value)
+            if allowed is not None and value not in allowed:
+                errors.append(_error(key, 'enum', f"Invalid {label.lower()}"))
+                continue
+            values[name] = value
+
+        current = self._level_rank.get(values.get('currentLevel'))
+        target = self._level_rank.get(values.get('targetLevel'))
+        if current is not None and target is not None and current >= target:
+            errors.append(_error('targetLevel', 'order', "Target level must be higher than current level"))
+
+        return values, errors
+
+
+# validate-inputs checks the schema as is; create-plan bodies carry the goal as
+# 'goalReason', which may be left empty
+input_schema = CompiledSchema(CREATE_PLAN_SCHEMA)
+plan_request_schema = CompiledSchema(CREATE_PLAN_SCHEMA, rename={'goal': 'goalReason'}, optional=('goal',))
+
+
+def parse_plan_request(data: Any) -> Dict[str, Any]:
+    """
+    Validate a create-plan request body and turn it into the keyword arguments of a plan engine
+
+    Raises:
+        ValidationError: If anything in the body is missing or invalid
+    """
+    values, errors = plan_request_schema.validate(data)
+    if errors:
+        raise ValidationError(errors)
+    return {
+        'goal': f"I want to learn {values['skill']} to {values['goal']}",
+        'skill': values['skill'],
+        'skill_level': {
+            'current': values['currentLevel'],
+            'target': values['targetLevel']
+        },
+        'commitment_level': values['commitment']
+    }
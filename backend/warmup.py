@@ -0,0 +1,56 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class WarmUp:
+    """
+    Runs a warm-up function once in a background thread and tracks its progress
+
+    The process can accept requests while it runs; readiness waits for it.
+
+    Args:
+        fn: What to warm up
+    """
+
+    def __init__(self, fn: Callable[[], Any]):
+        self.fn = fn
+        self.started = False
+        self.finished = threading.Event()
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start warming up, unless it has already been started"""
+        with self._lock:
+            if self.started:
+                return
+            self.started = True
+        threading.Thread(target=self._run, name='warm-up', daemon=True).start()
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            self.fn()
+        except Exception as e:
+            # Whatever failed is retried lazily by the first request that needs it
+            print(f"Warm-up failed: {str(e)}")
+            self.error = str(e)
+        finally:
+            self.seconds = round(time.perf_counter() - start, 3)
+            self.finished.set()
+
+    @property
+    def ready(self) -> bool:
+        """Whether warm-up is done (or was never started)"""
+        return not self.started or self.finished.is_set()
+
+    def status(self) -> Dict[str, Any]:
+        if not self.started:
+            state = 'not_started'
+        elif not self.finished.is_set():
+            state = 'running'
+        else:
+            state = 'failed' if self.error else 'done'
+        return {'state': state, 'seconds': self.seconds, 'error': self.error}
@@ -0,0 +1,147 @@
+from typing import Any, Dict, List, Optional
+
+import mediawiki
+from cache import make_key
+from config import Config
+from singleflight import SingleFlight
+from tool_cache import build_backend
+
+# Fields the page endpoint can return; the first three come from a summary lookup
+SUMMARY_FIELDS = ('title', 'summary', 'url')
+PAGE_FIELDS = SUMMARY_FIELDS + ('text', 'sections', 'revision')
+
+page_cache = build_backend(
+    Config.TOOL_CACHE_BACKEND, 'wiki_pages', Config.WIKI_PAGE_CACHE_TTL, max_size=Config.WIKI_PAGE_CACHE_SIZE
+)
+search_cache = build_backend(Config.TOOL_CACHE_BACKEND, 'wiki_search', Config.WIKIPEDIA_CACHE_TTL)
+
+# Concurrent misses for the same page or query share one upstream request
+_flight = SingleFlight()
+
+# Cached for missing pages, so that lookups of pages that don't exist stay cheap
+_MISSING: Dict[str, Any] = {}
+
+
+def _cached(cache: Optional[Any], key: str, fetch, ttl: float) -> Any:
+    """Return the cached value for key, or fetch it once and cache it (empty values for the negative TTL)"""
+    if cache is not None:
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+    def load():
+        value = fetch()
+        if cache is not None:
+            cache.set(key, value, ttl if value else Config.TOOL_CACHE_NEGATIVE_TTL)
+        return value
+
+    value, _ = _flight.do(key, load)
+    return value
+
+
+def _page_key(kind: str, title: str) -> str:
+    # Titles are case-sensitive after the first letter, so they aren't lower-cased like make_key does
+    title = ' '.join(title.replace('_', ' ').split())
+    return f"{kind}:{title[:1].upper()}{title[1:]}"
+
+
+def get_page(title: str) -> Optional[Dict[str, Any]]:
+    """
+    Full page (title, url, revision and sections) from the page cache or MediaWiki
+
+    Returns:
+        The page, or None if it doesn't exist
+    """
+    page = _cached(page_cache, _page_key('page', title), lambda: mediawiki.fetch_page(title) or _MISSING,
+                   Config.WIKI_PAGE_CACHE_TTL)
+    return page or None
+
+
+def get_summary(title: str) -> Optional[Dict[str, str]]:
+    """
+    Title, intro summary and URL of a page, without fetching its full text unless it is already cached
+
+    Returns:
+        The summary, or None if the page doesn't exist
+    """
+    if page_cache is not None:
+        page = page_cache.get(_page_key('page', title))
+        if page is not None:
+            return page_summary(page) if page else None
+
+    def fetch():
+        return mediawiki.fetch_summaries([title]).get(title) or _MISSING
+
+    summary = _cached(page_cache, _page_key('summary', title), fetch, Config.WIKI_PAGE_CACHE_TTL)
+    return summary or None
+
+
+def page_summary(page: Dict[str, Any]) -> Dict[str, str]:
+    return {'title': page['title'], 'summary': page['sections'][0]['text'], 'url': page['url']}
+
+
+def section_text(sections: List[Dict[str, Any]]) -> str:
+    """Plain text of sections, with "== Heading ==" lines like the original extract"""
+    parts = []
+    for section in sections:
+        if section['title']:
+            marks = '=' * (section['level'] + 1)
+            parts.append(f"{marks} {section['title']} {marks}")
+        if section['text']:
+            parts.append(section['text'])
+    return '\n\n'.join(parts)
+
+
+def find_section(page: Dict[str, Any], section: str) -> Optional[Dict[str, Any]]:
+    """Look a section up by index or (case-insensitive) title"""
+    sections = page['sections']
+    if section.isdigit():
+        index = int(section)
+        return sections[index] if index < len(sections) else None
+    wanted = section.replace('_', ' ').strip().lower()
+    return next((s for s in sections if s['title'].lower() == wanted), None)
+
+
+def render_page(page: Dict[str, Any], fields: List[str], section: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Build the page endpoint response with only the requested fields
+
+    With a section, 'text' is that section's text (and its subsections', which
+    follow it with a deeper level); otherwise it is the whole page.
+    """
+    sections = page['sections']
+    if section is not None:
+        end = section['index'] + 1
+        while end < len(sections) and sections[end]['level'] > section['level']:
+            end += 1
+        selected = sections[section['index']:end]
+    else:
+        selected = sections
+
+    values = {
+        'title': lambda: page['title'],
+        'summary': lambda: sections[0]['text'],
+        'url': lambda: page['url'],
+        'revision': lambda: page['revision'],
+        'text': lambda: section_text(selected),
+        'sections': lambda: [{key: s[key] for key in ('index', 'title', 'level')} for s in sections]
+    }
+    body = {field: values[field]() for field in fields}
+    if section is not None:
+        body['section'] = {key: section[key] for key in ('index', 'title', 'level')}
+    return body
+
+
+def search(query: str, limit: int) -> List[Dict[str, str]]:
+    """
+    Wikipedia full-text search results with summaries, from the search cache or MediaWiki
+
+    Args:
+        query: Search terms
+        limit: Maximum number of results
+
+    Returns:
+        List of title, summary and URL dictionaries in ranking order
+    """
+    return _cached(search_cache, make_key('wiki_search', query, limit),
+                   lambda: mediawiki.search(query, limit), Config.WIKIPEDIA_CACHE_TTL)
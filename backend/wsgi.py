@@ -0,0 +1,17 @@
+"""
+WSGI entry point for production servers
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app (see gunicorn.conf.py) this module is imported once in the
+master, so configuration, the app and llama_index are loaded before workers
+are forked and their memory is shared copy-on-write. Anything holding threads
+or connections (warm-up, lanes, SQLite and HTTP connections) is created in each
+worker after the fork.
+"""
+from agent import load_llama_index
+from app import app
+from config import Config
+
+if Config.WARM_UP:
+    load_llama_index()